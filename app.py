@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 import sys
 import os
 
@@ -96,10 +95,11 @@ def main():
         
         st.markdown("### 📈 Stats rapides")
         try:
-            df = pd.read_csv("datas_cleaned/top5-players.csv")
-            st.metric("Total Joueurs", len(df))
-            st.metric("Ligues", len(df['Comp'].unique()))
-            st.metric("Équipes", len(df['Squad'].unique()))
+            from data_loader import get_summary
+            summary = get_summary("top5-players.csv")
+            st.metric("Total Joueurs", summary["players"])
+            st.metric("Ligues", summary["leagues"])
+            st.metric("Équipes", summary["squads"])
         except:
             st.info("Données en cours de chargement...")
     
@@ -2,37 +2,43 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
-import base64
+from data_loader import DATA_DIR, load_table
+from percentiles import PERCENTILE_SCOPES, compute_percentiles
+from logo_store import (THUMBNAIL_SIZE, get_base64_logo, get_club_logo_map, logo_folder,
+                        sprite_css, sprite_logo_html)
 
 def get_base64_image(image_path):
     try:
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
+        return get_base64_logo(image_path, THUMBNAIL_SIZE)
     except Exception as e:
         st.error(f"Erreur lors du chargement de l'image {image_path}: {e}")
         return ""
 
 @st.cache_data
 def load_data():
-    data_dir = "datas_cleaned"
     files_to_use = [
-        ("Defensive.csv", 1),
-        ("keepers.csv", 0),
-        ("Passing.csv", 1),
-        ("top5-players.csv", 0)
+        "Defensive.csv",
+        "keepers.csv",
+        "Passing.csv",
+        "top5-players.csv"
     ]
     dfs = []
-    for file, header_row in files_to_use:
-        path = os.path.join(data_dir, file)
-        if os.path.exists(path):
-            df = pd.read_csv(path, header=header_row)
-            dfs.append(df)
+    for file in files_to_use:
+        if os.path.exists(os.path.join(DATA_DIR, file)):
+            dfs.append(load_table(file))
     data = pd.concat(dfs, ignore_index=True)
     return data
 
+@st.cache_data
+def load_percentiles(scope='group'):
+    """Percentiles précalculés : par poste et ligue ('group') ou sur tous les joueurs ('overall')."""
+    group_cols, _ = PERCENTILE_SCOPES[scope]
+    return compute_percentiles(load_data(), group_cols)
+
 def show_general_dashboard():
     
     df = load_data()
+    percentiles = {scope: load_percentiles(scope) for scope in PERCENTILE_SCOPES}
 
     st.title("📊 Dashboard Général des Ligues de Football")
 
@@ -136,15 +142,12 @@ def show_general_dashboard():
     selected_leagues = [comp for comp, folder in st.session_state.selected_leagues]
     filtered_df = df[df[league_col].isin(selected_leagues)]
 
-    club_logo_map = {}
-    for folder_name in selected_league_folders:
-        club_logo_dir = os.path.join(logo_dir, folder_name)
-        for file in os.listdir(club_logo_dir):
-            if file.endswith(".png"):
-                club_name = file.replace(".png", "")
-                if club_name in set(filtered_df[club_col].dropna().unique()):
-                    logo_path = os.path.join(club_logo_dir, file)
-                    club_logo_map[club_name] = logo_path
+    clubs_in_selection = set(filtered_df[club_col].dropna().unique())
+    club_logo_map = {
+        club_name: logo_path
+        for club_name, logo_path in get_club_logo_map(logo_dir).items()
+        if club_name in clubs_in_selection and logo_folder(logo_path) in selected_league_folders
+    }
 
     if not st.session_state.selected_clubs or not all(club in club_logo_map for club in st.session_state.selected_clubs):
         st.session_state.selected_clubs = list(club_logo_map.keys())
@@ -165,6 +168,11 @@ def show_general_dashboard():
         for i in range(0, len(lst), n):
             yield lst[i:i + n]
 
+    st.markdown(
+        sprite_css(selected_league_folders, st.get_option("server.enableStaticServing")),
+        unsafe_allow_html=True
+    )
+
     club_items = sorted(club_logo_map.items())
     for row_idx, club_row in enumerate(chunk_list(club_items, 10)):
         club_cols = st.columns(10)
@@ -185,6 +193,10 @@ def show_general_dashboard():
                 
                 border_color = "#0074D9" if selected else "#DDD"
                 border_width = "4px" if selected else "2px"
+                logo_html = sprite_logo_html(logo_folder(logo_path), club)
+                if logo_html is None:
+                    logo_html = f'''<img src="data:image/png;base64,{get_base64_image(logo_path)}" 
+                             style="max-width:70px;max-height:70px;">'''
                 st.markdown(
                     f"""
                     <div style="border:{border_width} solid {border_color};
@@ -195,8 +207,7 @@ def show_general_dashboard():
                                 align-items:center;
                                 justify-content:center;
                                 margin-top:-10px;">
-                        <img src="data:image/png;base64,{get_base64_image(logo_path)}" 
-                             style="max-width:70px;max-height:70px;">
+                        {logo_html}
                     </div>
                     """,
                     unsafe_allow_html=True
@@ -397,14 +408,20 @@ def show_general_dashboard():
                     
                     st.markdown(f"**🏅 Top {nb_players} joueurs (moyenne des stats sélectionnées)**")
                     
-                    normalized_df = filtered_df.copy()
-                    for stat in selected_stats:
-                        if stat in normalized_df.columns and normalized_df[stat].max() > 0:
-                            normalized_df[f"{stat}_norm"] = normalized_df[stat] / normalized_df[stat].max()
-                    
-                    norm_cols = [f"{stat}_norm" for stat in selected_stats if f"{stat}_norm" in normalized_df.columns]
+                    # percentiles précalculés (voir load_percentiles)
+                    scope = st.radio(
+                        "Percentiles calculés",
+                        list(PERCENTILE_SCOPES),
+                        format_func=lambda key: PERCENTILE_SCOPES[key][1],
+                        horizontal=True,
+                        key="percentile_scope"
+                    )
+                    scope_percentiles = percentiles[scope]
+                    norm_cols = [stat for stat in selected_stats if stat in scope_percentiles.columns]
                     if norm_cols:
-                        normalized_df["avg_performance"] = normalized_df[norm_cols].mean(axis=1)
+                        normalized_df = filtered_df.assign(
+                            avg_performance=scope_percentiles.loc[filtered_df.index, norm_cols].mean(axis=1)
+                        )
                         top_overall = normalized_df.nlargest(nb_players, "avg_performance")[["Player", "avg_performance", club_col]]
                         
                         fig, ax = plt.subplots(figsize=(10, 6))
@@ -1,6 +1,6 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+from data_loader import load_table
 
 def show_accueil():
     
@@ -54,7 +54,7 @@ def show_accueil():
 
     @st.cache_data
     def load_data():
-        df = pd.read_csv("datas_cleaned/top5-players.csv")
+        df = load_table("top5-players.csv")
         return df
 
     df = load_data()
@@ -0,0 +1,249 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+DATA_DIR = "datas_cleaned"
+COLUMNAR_EXT = ".parquet"
+
+# Schéma explicite de chaque fichier nettoyé :
+#   - header : ligne d'entête à utiliser (les exports FBref ont une double entête)
+#   - text   : colonnes texte
+#   - int    : colonnes entières
+# Toutes les autres colonnes sont typées en float64 ('Unknown' -> NaN).
+POSITIONS_SCHEMA = {"header": 0, "text": ("Name", "Position"), "int": ()}
+
+SCHEMAS = {
+    "top5-players.csv": {
+        "header": 0,
+        "text": ("Player", "Nation", "Pos", "Squad", "Comp"),
+        "int": ("Rk", "Starts", "Gls", "Ast", "G+A", "G-PK", "PK", "PKatt", "CrdY", "CrdR"),
+    },
+    "Defensive.csv": {
+        "header": 1,
+        "text": ("Player", "Nation", "Pos", "Squad", "Comp", "Matches"),
+        "int": ("Rk", "Tkl", "TklW", "Def 3rd", "Mid 3rd", "Att 3rd", "Tkl.1", "Att", "Lost",
+                "Blocks", "Sh", "Pass", "Int", "Tkl+Int", "Clr", "Err"),
+    },
+    "Passing.csv": {
+        "header": 1,
+        "text": ("Player", "Nation", "Pos", "Squad", "Comp", "Matches"),
+        "int": ("Rk", "Cmp", "Att", "TotDist", "PrgDist", "Cmp.1", "Att.1", "Cmp.2", "Att.2",
+                "Cmp.3", "Att.3", "Ast", "KP", "1/3", "PPA", "CrsPA", "PrgP"),
+    },
+    "keepers.csv": {
+        "header": 1,
+        "text": ("Player", "Nation", "Squad", "Comp"),
+        "int": ("Rk", "Age", "Born", "MP", "Starts", "Min", "GA", "SoTA", "Saves", "W", "D", "L",
+                "CS", "PKA", "PKsv"),
+    },
+    "players_positions.csv": POSITIONS_SCHEMA,
+    "premier_league_players_positions.csv": POSITIONS_SCHEMA,
+    "bundesliga_players_positions.csv": POSITIONS_SCHEMA,
+    "liga_players_positions.csv": POSITIONS_SCHEMA,
+    "ligue_1_players_positions.csv": POSITIONS_SCHEMA,
+    "serie_a_players_positions.csv": POSITIONS_SCHEMA,
+}
+
+def _profiles_schema():
+    # Table large construite par player_profiles.py : colonnes de top5 + poste détaillé
+    # + colonnes de Defensive/Passing préfixées par def_/pass_
+    top5 = SCHEMAS["top5-players.csv"]
+    text = list(top5["text"]) + ["Detailed_Position"]
+    ints = ["player_id"] + list(top5["int"])
+    for filename, prefix in (("Defensive.csv", "def_"), ("Passing.csv", "pass_")):
+        text += [prefix + col for col in SCHEMAS[filename]["text"]]
+        ints += [prefix + col for col in SCHEMAS[filename]["int"]]
+    return {"header": 0, "text": tuple(text), "int": tuple(ints)}
+
+SCHEMAS["player_profiles.csv"] = _profiles_schema()
+
+# Table de correspondance nom -> identifiant joueur construite par player_ids.py
+SCHEMAS["player_ids.csv"] = {
+    "header": 0,
+    "text": ("source", "Player", "name_norm", "match_type"),
+    "int": ("player_id",),
+}
+
+def columnar_path(filename, data_dir=DATA_DIR):
+    return os.path.join(data_dir, os.path.splitext(filename)[0] + COLUMNAR_EXT)
+
+def apply_schema(df, filename, complete_ints=None):
+    """Applique le schéma du fichier aux colonnes d'un DataFrame.
+
+    complete_ints : colonnes entières sans valeur manquante sur tout le fichier, quand df
+    n'en est qu'un bloc (sinon décidé sur df).
+    """
+    schema = SCHEMAS.get(filename)
+    if schema is None:
+        return df
+
+    for col in df.columns:
+        if col in schema["text"]:
+            if pd.api.types.is_numeric_dtype(df[col]):
+                # les valeurs manquantes restent manquantes (pas de texte "nan")
+                df[col] = df[col].astype(str).where(df[col].notna())
+            continue
+
+        values = pd.to_numeric(df[col], errors="coerce")
+        complete = values.notna().all() if complete_ints is None else col in complete_ints
+        if col in schema["int"] and complete:
+            df[col] = values.astype("int64")
+        else:
+            df[col] = values.astype("float64")
+
+    return df
+
+def read_csv_typed(filename, data_dir=DATA_DIR):
+    """Lit un CSV nettoyé avec son entête et ses types explicites."""
+    header = SCHEMAS.get(filename, {}).get("header", 0)
+    df = pd.read_csv(os.path.join(data_dir, filename), header=header)
+    return apply_schema(df, filename)
+
+def _is_columnar_fresh(filename, data_dir):
+    parquet_path = columnar_path(filename, data_dir)
+    if not os.path.exists(parquet_path):
+        return False
+    csv_path = os.path.join(data_dir, filename)
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+
+def load_table(filename, data_dir=DATA_DIR):
+    """Charge un fichier de datas_cleaned, depuis la copie colonnaire si elle est à jour."""
+    if filename in SCHEMAS and _is_columnar_fresh(filename, data_dir):
+        try:
+            return pd.read_parquet(columnar_path(filename, data_dir))
+        except (ImportError, OSError, ValueError):
+            pass
+    return read_csv_typed(filename, data_dir)
+
+# Registre partagé par tout le process : filename -> (signature, df, résumé)
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+def _file_signature(filename, data_dir):
+    signature = []
+    for path in (os.path.join(data_dir, filename), columnar_path(filename, data_dir)):
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+def summarize(df):
+    """Compteurs affichés dans la sidebar (joueurs, ligues, équipes)."""
+    return {
+        "players": len(df),
+        "leagues": df['Comp'].nunique(dropna=False) if 'Comp' in df.columns else 0,
+        "squads": df['Squad'].nunique(dropna=False) if 'Squad' in df.columns else 0,
+    }
+
+def _registry_entry(filename, data_dir):
+    signature = _file_signature(filename, data_dir)
+    key = (data_dir, filename)
+    with _REGISTRY_LOCK:
+        entry = _REGISTRY.get(key)
+        if entry is None or entry[0] != signature:
+            df = load_table(filename, data_dir)
+            entry = (signature, df, summarize(df))
+            _REGISTRY[key] = entry
+    return entry
+
+def get_dataset(filename, data_dir=DATA_DIR):
+    """DataFrame partagé (ne pas modifier), rechargé seulement si le fichier change."""
+    return _registry_entry(filename, data_dir)[1]
+
+def get_summary(filename, data_dir=DATA_DIR):
+    """Résumé précalculé du dataset, rechargé seulement si le fichier change."""
+    return _registry_entry(filename, data_dir)[2]
+
+def write_atomic(path, write):
+    """Appelle write(tmp_path) puis renomme tmp_path en path.
+
+    Un lecteur (le dashboard) voit soit l'ancien fichier, soit le nouveau complet,
+    jamais un fichier à moitié écrit.
+    """
+    directory, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    # même dossier (renommage atomique), extension conservée (to_excel la lit)
+    tmp_path = os.path.join(directory, f".{stem}.{os.getpid()}.tmp{ext}")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def resolve_dtype(dtypes):
+    """Type d'une colonne sur tout le fichier, d'après les types vus bloc par bloc (comme read_csv en une fois)."""
+    if len(dtypes) == 1:
+        return next(iter(dtypes))
+    if all(pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) for dtype in dtypes):
+        return np.dtype("float64")
+    return str
+
+def _write_parquet_chunks(filename, data_dir, path, chunksize):
+    # Deux lectures par blocs : types du fichier entier, puis un groupe de lignes Parquet par bloc
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    csv_path = os.path.join(data_dir, filename)
+    schema = SCHEMAS[filename]
+    seen, complete = {}, {}
+    with pd.read_csv(csv_path, header=schema["header"], chunksize=chunksize) as reader:
+        for chunk in reader:
+            for col in chunk.columns:
+                seen.setdefault(col, set()).add(chunk[col].dtype)
+                if col in schema["int"]:
+                    full = bool(pd.to_numeric(chunk[col], errors="coerce").notna().all())
+                    complete[col] = complete.get(col, True) and full
+    dtypes = {col: resolve_dtype(kinds) for col, kinds in seen.items() if len(kinds) > 1}
+    complete_ints = {col for col, full in complete.items() if full}
+
+    writer = None
+    try:
+        with pd.read_csv(csv_path, header=schema["header"], chunksize=chunksize, dtype=dtypes) as reader:
+            for chunk in reader:
+                table = pa.Table.from_pandas(apply_schema(chunk, filename, complete_ints), preserve_index=False)
+                if writer is None:
+                    # colonne texte vide dans le premier bloc (pandas 2 : type null) -> texte
+                    fields = [field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                              for field in table.schema]
+                    writer = pq.ParquetWriter(path, pa.schema(fields, metadata=table.schema.metadata))
+                writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        apply_schema(pd.read_csv(csv_path, header=schema["header"], nrows=0), filename).to_parquet(path, index=False)
+
+def write_columnar(filename, data_dir=DATA_DIR, chunksize=None):
+    """Écrit la copie colonnaire typée d'un CSV nettoyé. Retourne False si impossible.
+
+    Avec chunksize, le CSV est converti par blocs de chunksize lignes sans être chargé en entier.
+    """
+    if filename not in SCHEMAS:
+        return False
+    try:
+        if chunksize:
+            write_atomic(columnar_path(filename, data_dir),
+                         lambda path: _write_parquet_chunks(filename, data_dir, path, chunksize))
+        else:
+            df = read_csv_typed(filename, data_dir)
+            write_atomic(columnar_path(filename, data_dir), lambda path: df.to_parquet(path, index=False))
+        return True
+    except ImportError as e:
+        print(f"✗ {filename} - copie colonnaire ignorée (pyarrow manquant) : {e}")
+        return False
+
+def build_columnar_store(data_dir=DATA_DIR):
+    """Régénère les copies colonnaires de tous les fichiers présents dans data_dir."""
+    for filename in SCHEMAS:
+        if os.path.exists(os.path.join(data_dir, filename)) and write_columnar(filename, data_dir):
+            print(f"✓ {columnar_path(filename, data_dir)} written")
+
+if __name__ == "__main__":
+    build_columnar_store()
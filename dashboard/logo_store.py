@@ -0,0 +1,206 @@
+import base64
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Les logos sont affichés entre 70 et 80px : on garde une marge pour les écrans HiDPI
+THUMBNAIL_SIZE = 160
+MAX_CACHED_LOGOS = 512
+
+# Sprites : un PNG par ligue (logos/<ligue>/) + un manifeste JSON des positions
+SPRITES_DIR = os.path.join("static", "sprites")
+SPRITE_MANIFEST = "manifest.json"
+SPRITE_CELL = 70
+SPRITE_COLUMNS = 10
+# URL servie par Streamlit quand server.enableStaticServing est activé
+SPRITES_STATIC_URL = "app/static/sprites"
+
+# Cache LRU partagé par tout le process : (path, mtime, size) -> base64
+_LOGO_CACHE = OrderedDict()
+_LOGO_CACHE_LOCK = threading.Lock()
+
+def _encode_logo(path, size):
+    with open(path, "rb") as img_file:
+        data = img_file.read()
+
+    if size:
+        try:
+            from PIL import Image
+        except ImportError:
+            Image = None
+
+        if Image is not None:
+            image = Image.open(io.BytesIO(data))
+            if max(image.size) > size:
+                image.thumbnail((size, size))
+                buffer = io.BytesIO()
+                image.save(buffer, format="PNG", optimize=True)
+                data = buffer.getvalue()
+
+    return base64.b64encode(data).decode()
+
+def get_base64_logo(path, size=None):
+    """Logo encodé en base64, lu et (si size est donné) réduit une seule fois par process."""
+    key = (path, os.path.getmtime(path), size)
+
+    with _LOGO_CACHE_LOCK:
+        if key in _LOGO_CACHE:
+            _LOGO_CACHE.move_to_end(key)
+            return _LOGO_CACHE[key]
+
+    encoded = _encode_logo(path, size)
+
+    with _LOGO_CACHE_LOCK:
+        _LOGO_CACHE[key] = encoded
+        _LOGO_CACHE.move_to_end(key)
+        while len(_LOGO_CACHE) > MAX_CACHED_LOGOS:
+            _LOGO_CACHE.popitem(last=False)
+
+    return encoded
+
+def clear_logo_cache():
+    with _LOGO_CACHE_LOCK:
+        _LOGO_CACHE.clear()
+
+LOGO_DIR = "logos"
+LEAGUE_FOLDERS = ["premier_league", "ligue_1", "bundesliga", "liga", "serie_a"]
+
+# Anciens noms de clubs utilisés par la page joueurs -> nom du fichier logo
+CLUB_ALIASES = {
+    "Bayer Leverkusen": "Leverkusen",
+    "VfB Stuttgart": "Stuttgart",
+    "VfL Bochum": "Bochum",
+    "AC Milan": "Milan"
+}
+
+_CLUB_LOGO_MAP_CACHE = {}
+
+def _logo_dirs_signature(logo_dir):
+    signature = []
+    for folder in LEAGUE_FOLDERS:
+        try:
+            signature.append(os.stat(os.path.join(logo_dir, folder)).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def get_club_logo_map(logo_dir=LOGO_DIR):
+    """Table nom du club -> chemin du logo, construite une fois par process (relue si un dossier change)."""
+    signature = _logo_dirs_signature(logo_dir)
+    cached = _CLUB_LOGO_MAP_CACHE.get(logo_dir)
+    if cached is None or cached[0] != signature:
+        club_logo_map = {}
+        for folder in LEAGUE_FOLDERS:
+            club_logo_dir = os.path.join(logo_dir, folder)
+            if not os.path.isdir(club_logo_dir):
+                continue
+            for file in sorted(os.listdir(club_logo_dir)):
+                if file.endswith(".png"):
+                    club_logo_map[file.replace(".png", "")] = os.path.join(club_logo_dir, file)
+        cached = (signature, club_logo_map)
+        _CLUB_LOGO_MAP_CACHE[logo_dir] = cached
+    return cached[1]
+
+def resolve_club_logo(club_name, logo_dir=LOGO_DIR):
+    """Chemin du logo d'un club, ou None."""
+    club_logo_map = get_club_logo_map(logo_dir)
+    return club_logo_map.get(club_name) or club_logo_map.get(CLUB_ALIASES.get(club_name))
+
+def logo_folder(logo_path):
+    """Dossier de ligue d'un logo de club (ex: 'liga')."""
+    return os.path.basename(os.path.dirname(logo_path))
+
+def build_logo_sprites(logo_dir=LOGO_DIR, out_dir=SPRITES_DIR, cell=SPRITE_CELL, columns=SPRITE_COLUMNS):
+    """Assemble les logos de chaque dossier de ligue en une planche réduite + manifeste JSON."""
+    from PIL import Image
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {"cell": cell, "leagues": {}}
+
+    for folder in sorted(os.listdir(logo_dir)):
+        folder_path = os.path.join(logo_dir, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        files = sorted(f for f in os.listdir(folder_path) if f.endswith(".png"))
+        if not files:
+            continue
+
+        rows = (len(files) + columns - 1) // columns
+        sheet = Image.new("RGBA", (columns * cell, rows * cell), (0, 0, 0, 0))
+        logos = {}
+        for i, file in enumerate(files):
+            image = Image.open(os.path.join(folder_path, file)).convert("RGBA")
+            image.thumbnail((cell, cell))
+            x = (i % columns) * cell
+            y = (i // columns) * cell
+            sheet.paste(image, (x + (cell - image.width) // 2, y + (cell - image.height) // 2), image)
+            logos[file.replace(".png", "")] = {"x": x, "y": y}
+
+        # palette 256 couleurs : planche ~3x plus légère, sans perte visible à cette taille
+        sheet = sheet.quantize(256, method=Image.Quantize.FASTOCTREE)
+        sprite_file = f"{folder}.png"
+        sheet.save(os.path.join(out_dir, sprite_file), optimize=True)
+        manifest["leagues"][folder] = {
+            "sprite": sprite_file,
+            "width": sheet.width,
+            "height": sheet.height,
+            "logos": logos
+        }
+
+    with open(os.path.join(out_dir, SPRITE_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+_SPRITE_MANIFEST_CACHE = {}
+
+def load_sprite_manifest(sprites_dir=SPRITES_DIR):
+    """Manifeste des sprites (None s'il n'a pas été généré), relu seulement s'il change."""
+    path = os.path.join(sprites_dir, SPRITE_MANIFEST)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    cached = _SPRITE_MANIFEST_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, encoding="utf-8") as f:
+            cached = (mtime, json.load(f))
+        _SPRITE_MANIFEST_CACHE[path] = cached
+    return cached[1]
+
+def sprite_css(folders, static_serving=False, sprites_dir=SPRITES_DIR):
+    """Bloc <style> qui charge une seule fois la planche de chaque ligue sélectionnée."""
+    manifest = load_sprite_manifest(sprites_dir)
+    if manifest is None:
+        return ""
+
+    cell = manifest["cell"]
+    rules = [f".logo-sprite {{ width:{cell}px; height:{cell}px; background-repeat:no-repeat; }}"]
+    for folder in folders:
+        league = manifest["leagues"].get(folder)
+        if league is None:
+            continue
+        if static_serving:
+            url = f"{SPRITES_STATIC_URL}/{league['sprite']}"
+        else:
+            url = "data:image/png;base64," + get_base64_logo(os.path.join(sprites_dir, league["sprite"]))
+        rules.append(f".logo-sprite-{folder} {{ background-image:url('{url}'); }}")
+    return "<style>" + "\n".join(rules) + "</style>"
+
+def sprite_logo_html(folder, club_name, sprites_dir=SPRITES_DIR):
+    """<div> qui affiche le logo du club depuis la planche de sa ligue, ou None s'il n'y est pas."""
+    manifest = load_sprite_manifest(sprites_dir)
+    if manifest is None:
+        return None
+    position = manifest["leagues"].get(folder, {}).get("logos", {}).get(club_name)
+    if position is None:
+        return None
+    return (f'<div class="logo-sprite logo-sprite-{folder}" '
+            f'style="background-position:-{position["x"]}px -{position["y"]}px;"></div>')
+
+if __name__ == "__main__":
+    manifest = build_logo_sprites()
+    for folder, league in manifest["leagues"].items():
+        print(f"✓ {folder}: {len(league['logos'])} logos -> {os.path.join(SPRITES_DIR, league['sprite'])}")
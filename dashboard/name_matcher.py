@@ -0,0 +1,192 @@
+import difflib
+import math
+import os
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from data_loader import write_atomic
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s-]")  # garde lettres, chiffres, underscore, espaces et tiret
+_SPACES_RE = re.compile(r"\s+")
+
+@lru_cache(maxsize=65536)
+def _normalize_text(s):
+    s = unicodedata.normalize('NFKD', s.strip())
+    s = ''.join(ch for ch in s if not unicodedata.combining(ch))
+    s = s.casefold()
+    s = _PUNCTUATION_RE.sub("", s)
+    return _SPACES_RE.sub(" ", s)
+
+def normalize_name(name):
+    """Normalise un nom : sans accents, casefold, sans ponctuation, espaces normalisés (mémoïsé)."""
+    if pd.isna(name):
+        return ""
+    return _normalize_text(str(name))
+
+@lru_cache(maxsize=1)
+def _combining_re():
+    # tous les caractères combinants d'Unicode, regroupés en intervalles, pour une seule regex
+    ranges = []
+    for code in range(sys.maxunicode + 1):
+        if unicodedata.combining(chr(code)):
+            if ranges and ranges[-1][1] == code - 1:
+                ranges[-1][1] = code
+            else:
+                ranges.append([code, code])
+    return re.compile("[" + "".join(f"{re.escape(chr(a))}-{re.escape(chr(b))}" for a, b in ranges) + "]")
+
+def normalize_names(values, known=None):
+    """normalize_name appliqué à toute une colonne, avec les méthodes .str de pandas.
+
+    Chaque nom distinct n'est normalisé qu'une fois ; known (nom -> nom normalisé,
+    voir read_name_cache) évite de recalculer les noms déjà connus et est complété
+    avec les nouveaux.
+    """
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object).astype(str)
+
+    normalized = uniques.map(known if known is not None else {}).astype(object)
+    todo = normalized.isna()
+    if todo.any():
+        normalized[todo] = (
+            uniques[todo].str.strip()
+            .str.normalize('NFKD')
+            .str.replace(_combining_re(), "", regex=True)
+            .str.casefold()
+            .str.replace(_PUNCTUATION_RE, "", regex=True)
+            .str.replace(_SPACES_RE, " ", regex=True)
+            .astype(object)
+        )
+        if known is not None:
+            known.update(zip(uniques[todo], normalized[todo]))
+
+    # code -1 : valeur manquante
+    lookup = np.append(normalized.to_numpy(dtype=object), "")
+    return pd.Series(lookup[codes], index=values.index, dtype=object)
+
+# Cache persistant des noms normalisés (à côté des données), versionné avec l'algorithme
+NAME_CACHE_VERSION = 1
+
+def read_name_cache(path):
+    """Nom -> nom normalisé depuis le cache sur disque (vide s'il manque ou est d'une autre version)."""
+    if not os.path.exists(path):
+        return {}
+    cache = pd.read_csv(path, dtype=str, keep_default_na=False)
+    if list(cache.columns) != ['name', 'name_norm', 'version'] or (cache['version'] != str(NAME_CACHE_VERSION)).any():
+        return {}
+    return dict(zip(cache['name'], cache['name_norm']))
+
+def write_name_cache(path, mapping):
+    """Écrit le cache nom -> nom normalisé (fichier temporaire puis renommage)."""
+    cache = pd.DataFrame({'name': list(mapping), 'name_norm': list(mapping.values())})
+    cache['version'] = NAME_CACHE_VERSION
+    write_atomic(path, lambda tmp_path: cache.to_csv(tmp_path, index=False))
+
+def name_ngrams(name):
+    """Bigrammes de caractères d'un nom (avec bords), numérotés pour garder les répétitions."""
+    padded = f" {name} "
+    seen = defaultdict(int)
+    grams = set()
+    for i in range(len(padded) - 1):
+        gram = padded[i:i + 2]
+        grams.add((gram, seen[gram]))
+        seen[gram] += 1
+    return grams
+
+def last_name(name):
+    tokens = name.split()
+    return tokens[-1] if tokens else ""
+
+def min_shared_ngrams(length_a, length_b, cutoff):
+    """Nombre minimal de bigrammes communs pour que ratio() puisse atteindre cutoff.
+
+    Avec M caractères appariés en k blocs : au moins M - k bigrammes communs,
+    et k - 1 <= (la - M) + (lb - M). Comme M >= cutoff * (la + lb) / 2, il faut
+    au moins (1.5 * cutoff - 1) * (la + lb) - 1 bigrammes communs.
+    """
+    return math.ceil((1.5 * cutoff - 1) * (length_a + length_b) - 1 - 1e-9)
+
+class NameMatcher:
+    """Index des noms normalisés -> valeur, pour apparier exact -> fuzzy -> nom de famille.
+
+    Même résultat que difflib.get_close_matches(name, keys, n=1) suivi du repli
+    sur le nom de famille, mais seuls les noms qui partagent assez de bigrammes
+    avec le nom cherché (et de longueur compatible avec le seuil) sont comparés.
+    """
+
+    def __init__(self, mapping):
+        self.mapping = dict(mapping)
+        self.keys = list(self.mapping)
+        self._key_ngrams = [name_ngrams(key) for key in self.keys]
+        self._ngram_index = defaultdict(list)
+        self._last_names = defaultdict(list)
+        for i, key in enumerate(self.keys):
+            for gram in self._key_ngrams[i]:
+                self._ngram_index[gram].append(i)
+            if key:
+                self._last_names[last_name(key)].append(key)
+
+    def candidates(self, name, cutoff):
+        """Noms de l'index qui peuvent atteindre le ratio cutoff avec name."""
+        grams = name_ngrams(name)
+        length = len(name)
+        min_length = math.ceil(length * cutoff / (2 - cutoff) - 1e-9)
+        needed = min_shared_ngrams(length, min_length, cutoff)
+
+        if needed <= 0:
+            ids = range(len(self.keys))
+        else:
+            # filtrage par préfixe : un candidat partage forcément un des
+            # len(grams) - needed + 1 bigrammes les plus rares du nom
+            rare = sorted(grams, key=lambda gram: len(self._ngram_index.get(gram, ())))
+            ids = set()
+            for gram in rare[:max(len(grams) - needed + 1, 0)]:
+                ids.update(self._ngram_index.get(gram, ()))
+
+        for i in ids:
+            key_length = len(self.keys[i])
+            # borne de real_quick_ratio : 2 * min(la, lb) / (la + lb)
+            if 2 * min(length, key_length) < cutoff * (length + key_length):
+                continue
+            if needed > 0 and len(grams & self._key_ngrams[i]) < min_shared_ngrams(length, key_length, cutoff):
+                continue
+            yield self.keys[i]
+
+    def best_fuzzy(self, name, cutoff):
+        """Meilleur nom au sens de difflib (ratio le plus haut, puis ordre décroissant), ou None."""
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(name)
+        best = None
+        for key in self.candidates(name, cutoff):
+            matcher.set_seq1(key)
+            if matcher.quick_ratio() < cutoff:
+                continue
+            score = matcher.ratio()
+            if score >= cutoff and (best is None or (score, key) > best):
+                best = (score, key)
+        return best[1] if best else None
+
+    def match(self, name, fuzzy_cutoff=0.85, last_name_fallback=True):
+        """Retourne (valeur, match_type) ou (None, None)."""
+        if not name:
+            return None, None
+        # 1) match exact
+        if name in self.mapping:
+            return self.mapping[name], 'exact'
+        # 2) fuzzy, restreint aux candidats de l'index
+        fuzzy = self.best_fuzzy(name, fuzzy_cutoff)
+        if fuzzy is not None:
+            return self.mapping[fuzzy], f'fuzzy:{fuzzy}'
+        # 3) nom de famille (dernier token) s'il est unique dans la base
+        if not last_name_fallback:
+            return None, None
+        candidates = self._last_names.get(last_name(name), [])
+        if len(candidates) == 1:
+            return self.mapping[candidates[0]], f'lastname:{candidates[0]}'
+        return None, None
@@ -0,0 +1,21 @@
+import numpy as np
+
+# Groupes de comparaison par défaut : même poste, même ligue
+PERCENTILE_GROUPS = ['Pos', 'Comp']
+
+# Tables précalculées par les pages : portée -> (groupes, libellé)
+PERCENTILE_SCOPES = {
+    'group': (PERCENTILE_GROUPS, "Par poste et par ligue"),
+    'overall': (None, "Tous les joueurs"),
+}
+
+def compute_percentiles(df, group_cols=None, columns=None):
+    """Rang percentile (entre 0 et 1) de chaque stat numérique, par groupe ou sur tout le dataset.
+
+    Le résultat garde l'index de df : une page peut donc lire les percentiles d'un
+    sous-ensemble filtré avec .loc[filtered_df.index, stats]."""
+    if columns is None:
+        columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    if not group_cols:
+        return df[columns].rank(pct=True)
+    return df.groupby(list(group_cols), dropna=False)[columns].rank(pct=True)
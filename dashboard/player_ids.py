@@ -0,0 +1,210 @@
+import os
+import pandas as pd
+from data_loader import DATA_DIR, load_table, write_atomic, write_columnar
+from name_matcher import NameMatcher, normalize_name
+
+CROSSWALK_FILE = "player_ids.csv"
+CROSSWALK_COLUMNS = ['player_id', 'source', 'Player', 'Born', 'name_norm', 'match_type']
+
+# Fichiers FBref (colonnes Player, Born, Comp ; Pos sauf pour les gardiens)
+KEEPERS_FILE = "keepers.csv"
+STATS_FILES = ["top5-players.csv", "Defensive.csv", "Passing.csv", KEEPERS_FILE]
+
+# Écart toléré entre les années de naissance d'un même joueur d'un tableau FBref à l'autre
+BIRTH_TOLERANCE = 1
+
+# Fichiers de postes : un nom seulement, apparié d'abord dans la ligue du fichier
+LEAGUE_POSITIONS_FILES = {
+    "premier_league_players_positions.csv": "eng Premier League",
+    "bundesliga_players_positions.csv": "de Bundesliga",
+    "liga_players_positions.csv": "es La Liga",
+    "ligue_1_players_positions.csv": "fr Ligue 1",
+    "serie_a_players_positions.csv": "it Serie A"
+}
+
+def _born_key(born):
+    return None if pd.isna(born) else int(born)
+
+def _same_player(records, filename, birth, squad, keeper):
+    """La fiche (filename, birth, squad, keeper) peut-elle appartenir au joueur décrit par records ?"""
+    close = False
+    for other_file, other_birth, other_squad, other_keeper in records:
+        # homonymes d'un même tableau
+        if other_file == filename and None not in (birth, other_birth) and other_birth != birth:
+            return False
+        # tableau des gardiens contre tableau de champ : le poste doit concorder
+        if (other_file == KEEPERS_FILE) != (filename == KEEPERS_FILE):
+            if None not in (keeper, other_keeper) and keeper != other_keeper:
+                return False
+        # naissance proche d'une fiche, ou même club (naissance imputée dans un des tableaux)
+        if None in (birth, other_birth) or abs(other_birth - birth) <= BIRTH_TOLERANCE or squad == other_squad:
+            close = True
+    return close
+
+def _known_ids(previous):
+    """(nom normalisé, naissance) -> player_id d'une table de correspondance existante."""
+    if previous is None or previous.empty:
+        return {}
+    # les noms de postes rattachés à un joueur FBref ne définissent pas d'identité
+    identities = previous[previous['match_type'].isin(['key', 'new'])]
+    return {
+        (name_norm, _born_key(born)): int(player_id)
+        for name_norm, born, player_id in zip(identities['name_norm'], identities['Born'], identities['player_id'])
+    }
+
+def build_crosswalk(tables, previous=None, fuzzy_cutoff=0.85):
+    """Table de correspondance (source, nom, naissance) -> player_id entier.
+
+    tables : nom de fichier -> DataFrame (fichiers de STATS_FILES et LEAGUE_POSITIONS_FILES).
+    previous : ancienne table, pour garder les mêmes identifiants d'une reconstruction à l'autre.
+    """
+    known = _known_ids(previous)
+    next_id = max(known.values(), default=0) + 1
+    rows = []
+
+    def identity(key):
+        nonlocal next_id
+        if key not in known:
+            known[key] = next_id
+            next_id += 1
+        return known[key]
+
+    # 1) FBref : un joueur par nom normalisé, séparé en plusieurs identités quand les fiches
+    #    se contredisent (naissance trop éloignée, gardien contre joueur de champ)
+    stats_rows = []
+    for filename in STATS_FILES:
+        df = tables.get(filename)
+        if df is None or 'Player' not in df.columns:
+            continue
+        born = df['Born'] if 'Born' in df.columns else pd.Series(None, index=df.index)
+        comp = df['Comp'] if 'Comp' in df.columns else pd.Series(None, index=df.index)
+        squad = df['Squad'] if 'Squad' in df.columns else pd.Series(None, index=df.index)
+        pos = df['Pos'] if 'Pos' in df.columns else pd.Series(None, index=df.index)
+        for name, birth, league, club, position in dict.fromkeys(zip(df['Player'], born, comp, squad, pos)):
+            if pd.isna(name):
+                continue
+            if filename == KEEPERS_FILE:
+                keeper = True
+            else:
+                keeper = None if pd.isna(position) else 'GK' in position
+            stats_rows.append((filename, name, _born_key(birth), normalize_name(name), league, club, keeper))
+
+    persons = []  # (nom normalisé, fiches (fichier, naissance, club, gardien) du joueur)
+    persons_by_name = {}  # nom normalisé -> indices dans persons (plusieurs : homonymes)
+    members = []
+    for filename, name, birth, name_norm, league, club, keeper in stats_rows:
+        candidates = persons_by_name.setdefault(name_norm, [])
+        match = next((i for i in candidates if _same_player(persons[i][1], filename, birth, club, keeper)), None)
+        if match is None:
+            match = len(persons)
+            persons.append((name_norm, []))
+            candidates.append(match)
+        persons[match][1].append((filename, birth, club, keeper))
+        members.append(match)
+
+    # clé d'identité : le nom seul, ou le nom et la plus petite naissance pour les homonymes
+    person_ids = []
+    keys = set()
+    for name_norm, records in persons:
+        births = [birth for _, birth, _, _ in records if birth is not None]
+        key = (name_norm, min(births) if len(persons_by_name[name_norm]) > 1 and births else None)
+        if key in keys:
+            person_ids.append(next_id)
+            next_id += 1
+            continue
+        # nom nouvellement partagé : le premier joueur garde l'identifiant de l'ancienne table
+        if key not in known and (name_norm, None) in known and known[(name_norm, None)] not in person_ids:
+            known[key] = known[(name_norm, None)]
+        keys.add(key)
+        person_ids.append(identity(key))
+
+    league_names = {}
+    all_names = {}
+    for (filename, name, birth, name_norm, league, _, _), person in zip(stats_rows, members):
+        if len(persons_by_name[name_norm]) == 1:
+            birth = None
+        player_id = person_ids[person]
+        league_names.setdefault(league, {}).setdefault(name_norm, player_id)
+        all_names.setdefault(name_norm, set()).add(player_id)
+        rows.append((player_id, filename, name, birth, name_norm, 'key'))
+
+    # 2) Postes : exact ou fuzzy dans la ligue, puis nom exact ailleurs, sinon nouvel identifiant
+    for filename, league in LEAGUE_POSITIONS_FILES.items():
+        df = tables.get(filename)
+        if df is None or 'Name' not in df.columns:
+            continue
+        names = {name: normalize_name(name) for name in dict.fromkeys(df['Name'].dropna())}
+        league_map = league_names.get(league, {})
+        # le fuzzy ne peut pas rattacher un nom à un joueur déjà apparié exactement dans ce fichier
+        claimed = {league_map[name_norm] for name_norm in names.values() if name_norm in league_map}
+        matcher = NameMatcher({
+            name_norm: player_id for name_norm, player_id in league_map.items() if player_id not in claimed
+        })
+        for name, name_norm in names.items():
+            if name_norm in league_map:
+                player_id, match_type = league_map[name_norm], 'exact'
+            else:
+                player_id, match_type = matcher.match(name_norm, fuzzy_cutoff, last_name_fallback=False)
+            if player_id is None and len(all_names.get(name_norm, ())) == 1:
+                player_id, match_type = next(iter(all_names[name_norm])), 'name'
+            if player_id is None:
+                player_id, match_type = identity((name_norm, None)), 'new'
+            rows.append((player_id, filename, name, None, name_norm, match_type))
+
+    crosswalk = pd.DataFrame(rows, columns=CROSSWALK_COLUMNS).drop_duplicates(subset=['source', 'Player', 'Born'])
+    crosswalk['Born'] = crosswalk['Born'].astype('float64')
+    return crosswalk.reset_index(drop=True)
+
+def attach_player_ids(df, source, crosswalk, name_col='Player'):
+    """Copie de df avec une colonne player_id en tête (Int64, vide si le nom est inconnu)."""
+    ids = crosswalk[crosswalk['source'] == source]
+    # Born n'est renseigné que pour les homonymes, sinon le nom suffit
+    with_born = ids[ids['Born'].notna()]
+    by_born = {
+        (name, _born_key(born)): player_id
+        for name, born, player_id in zip(with_born['Player'], with_born['Born'], with_born['player_id'])
+    }
+    without_born = ids[ids['Born'].isna()]
+    by_name = dict(zip(without_born['Player'], without_born['player_id']))
+
+    names = df[name_col].tolist()
+    births = df['Born'].map(_born_key).tolist() if 'Born' in df.columns else [None] * len(df)
+    player_ids = [by_born.get((name, birth), by_name.get(name)) for name, birth in zip(names, births)]
+
+    df = df.copy()
+    df.insert(0, 'player_id', pd.array(player_ids, dtype='Int64'))
+    return df
+
+def load_source_tables(data_dir=DATA_DIR):
+    """Fichiers nettoyés utilisés pour construire la table de correspondance."""
+    tables = {}
+    for filename in STATS_FILES + list(LEAGUE_POSITIONS_FILES):
+        if os.path.exists(os.path.join(data_dir, filename)):
+            tables[filename] = load_table(filename, data_dir)
+    return tables
+
+def read_crosswalk(data_dir=DATA_DIR):
+    """Table de correspondance sauvegardée, ou None."""
+    if not os.path.exists(os.path.join(data_dir, CROSSWALK_FILE)):
+        return None
+    return load_table(CROSSWALK_FILE, data_dir)
+
+def write_crosswalk(data_dir=DATA_DIR, previous=None):
+    """Construit et sauvegarde la table de correspondance (CSV + copie colonnaire)."""
+    if previous is None:
+        previous = read_crosswalk(data_dir)
+    crosswalk = build_crosswalk(load_source_tables(data_dir), previous)
+    write_atomic(os.path.join(data_dir, CROSSWALK_FILE), lambda path: crosswalk.to_csv(path, index=False))
+    write_columnar(CROSSWALK_FILE, data_dir)
+    return crosswalk
+
+def load_crosswalk(data_dir=DATA_DIR):
+    """Charge la table de correspondance, ou la construit si elle n'existe pas encore."""
+    crosswalk = read_crosswalk(data_dir)
+    if crosswalk is None:
+        crosswalk = build_crosswalk(load_source_tables(data_dir))
+    return crosswalk
+
+if __name__ == "__main__":
+    crosswalk = write_crosswalk()
+    print(f"✓ {CROSSWALK_FILE} saved ({crosswalk['player_id'].nunique()} players, {len(crosswalk)} names)")
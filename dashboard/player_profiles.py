@@ -0,0 +1,82 @@
+import os
+import pandas as pd
+from data_loader import DATA_DIR, load_table, write_atomic, write_columnar
+from player_ids import LEAGUE_POSITIONS_FILES, attach_player_ids, load_crosswalk
+
+PROFILES_FILE = "player_profiles.csv"
+
+def load_all_positions(crosswalk, data_dir=DATA_DIR):
+    """Postes des fichiers par ligue, un par player_id et par ligue (colonne Comp)."""
+    positions = [
+        attach_player_ids(load_table(filename, data_dir), filename, crosswalk, name_col='Name').assign(Comp=league)
+        for filename, league in LEAGUE_POSITIONS_FILES.items()
+    ]
+    positions = pd.concat(positions, ignore_index=True)
+    return positions.dropna(subset=['player_id']).drop_duplicates(subset=['player_id', 'Comp'])
+
+def merge_prefixed(profiles, df, prefix):
+    """Ajoute les colonnes de df préfixées, sauf celles déjà renseignées dans profiles."""
+    df = df.dropna(subset=['player_id']).drop_duplicates(subset=['player_id'])
+    matched = profiles[['player_id']].merge(df, on='player_id', how='left')
+    
+    new_columns = {}
+    for col in df.columns:
+        if col not in profiles.columns:
+            new_columns[f"{prefix}{col}"] = matched[col]
+        else:
+            missing = profiles[col].isna()
+            if missing.any():
+                new_columns[f"{prefix}{col}"] = matched[col].where(missing)
+    
+    if not new_columns:
+        return profiles
+    return pd.concat([profiles, pd.DataFrame(new_columns, index=profiles.index)], axis=1)
+
+def build_player_profiles(top5_df, defensive_df, passing_df, positions_df, crosswalk):
+    """Table large, une ligne par joueur de champ : top5 + poste détaillé + def_* + pass_*.
+
+    Toutes les jointures se font sur player_id (voir player_ids.py).
+    """
+    profiles = attach_player_ids(top5_df, 'top5-players.csv', crosswalk)
+    profiles = profiles.drop_duplicates(subset=['player_id']).reset_index(drop=True)
+    
+    # poste de la ligue où le joueur a joué, sinon celui d'une autre ligue
+    same_league = profiles[['player_id', 'Comp']].merge(
+        positions_df[['player_id', 'Comp', 'Position']], on=['player_id', 'Comp'], how='left'
+    )['Position']
+    any_league = profiles[['player_id']].merge(
+        positions_df.drop_duplicates(subset=['player_id'])[['player_id', 'Position']], on='player_id', how='left'
+    )['Position']
+    profiles['Detailed_Position'] = same_league.fillna(any_league).to_numpy()
+    
+    profiles = merge_prefixed(profiles, attach_player_ids(defensive_df, 'Defensive.csv', crosswalk), 'def_')
+    profiles = merge_prefixed(profiles, attach_player_ids(passing_df, 'Passing.csv', crosswalk), 'pass_')
+    return profiles
+
+def _build_from_files(crosswalk, data_dir):
+    return build_player_profiles(
+        load_table('top5-players.csv', data_dir),
+        load_table('Defensive.csv', data_dir),
+        load_table('Passing.csv', data_dir),
+        load_all_positions(crosswalk, data_dir),
+        crosswalk
+    )
+
+def write_player_profiles(data_dir=DATA_DIR, crosswalk=None):
+    """Construit et sauvegarde la table des profils (CSV + copie colonnaire)."""
+    if crosswalk is None:
+        crosswalk = load_crosswalk(data_dir)
+    profiles = _build_from_files(crosswalk, data_dir)
+    write_atomic(os.path.join(data_dir, PROFILES_FILE), lambda path: profiles.to_csv(path, index=False))
+    write_columnar(PROFILES_FILE, data_dir)
+    return profiles
+
+def load_player_profiles(crosswalk, data_dir=DATA_DIR):
+    """Charge la table des profils matérialisée, ou la construit si elle n'existe pas encore."""
+    if os.path.exists(os.path.join(data_dir, PROFILES_FILE)):
+        return load_table(PROFILES_FILE, data_dir)
+    return _build_from_files(crosswalk, data_dir)
+
+if __name__ == "__main__":
+    profiles = write_player_profiles()
+    print(f"✓ {PROFILES_FILE} saved ({len(profiles)} players, {len(profiles.columns)} columns)")
@@ -3,122 +3,18 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
+from data_loader import load_table
+from player_ids import attach_player_ids, load_crosswalk
+from player_profiles import load_player_profiles
+from logo_store import resolve_club_logo
+from ratings import COMPARISON_METRICS, RATINGS, compute_player_scores
+from similarity import build_similarity_index, find_similar_players
 
 def show_players():
     st.title("⚽ Soccer Stats Players Dashboard")
 
 def get_club_logo(club_name):
-    import os
-    
-    club_mapping = {
-        "Arsenal": "premier_league/Arsenal.png",
-        "Chelsea": "premier_league/Chelsea.png",
-        "Liverpool": "premier_league/Liverpool.png",
-        "Manchester City": "premier_league/Man City.png",
-        "Manchester United": "premier_league/Man United.png",
-        "Tottenham": "premier_league/Tottenham.png",
-        "Newcastle": "premier_league/Newcastle.png",
-        "Brighton": "premier_league/Brighton.png",
-        "West Ham": "premier_league/West Ham.png",
-        "Aston Villa": "premier_league/Aston Villa.png",
-        "Fulham": "premier_league/Fulham.png",
-        "Brentford": "premier_league/Brentford.png",
-        "Crystal Palace": "premier_league/Crystal Palace.png",
-        "Bournemouth": "premier_league/Bournemouth.png",
-        "Wolves": "premier_league/Wolverhampton.png",
-        "Everton": "premier_league/Everton.png",
-        "Nottingham Forest": "premier_league/Nottingham.png",
-        "Sheffield United": "premier_league/Sheff Utd.png",
-        "Burnley": "premier_league/Burnley.png",
-        "Luton Town": "premier_league/Luton.png",
-        
-        "Real Madrid": "liga/Real Madrid.png",
-        "Barcelona": "liga/Barcelone.png",
-        "Atlético Madrid": "liga/Atlético.png",
-        "Athletic Club": "liga/Bilbao.png",
-        "Real Sociedad": "liga/Real Sociedad.png",
-        "Betis": "liga/Betis.png",
-        "Villarreal": "liga/Villarreal.png",
-        "Valencia": "liga/Valence.png",
-        "Sevilla": "liga/Séville.png",
-        "Girona": "liga/Girona.png",
-        "Las Palmas": "liga/Las Palmas.png",
-        "Getafe": "liga/Getafe.png",
-        "Osasuna": "liga/Osasuna.png",
-        "Celta Vigo": "liga/Celta Vigo.png",
-        "Rayo Vallecano": "liga/Vallecano.png",
-        "Cádiz": "liga/Cadix.png",
-        "Mallorca": "liga/Majorque.png",
-        "Almería": "liga/Almería.png",
-        "Granada": "liga/Grenade.png",
-        "Alavés": "liga/Alavés.png",
-        
-        "Bayern Munich": "bundesliga/Bayern Munich.png",
-        "Dortmund": "bundesliga/Dortmund.png",
-        "RB Leipzig": "bundesliga/Leipzig.png",
-        "Bayer Leverkusen": "bundesliga/Leverkusen.png",
-        "Eintracht Frankfurt": "bundesliga/Francfort.png",
-        "VfB Stuttgart": "bundesliga/Stuttgart.png",
-        "Freiburg": "bundesliga/Fribourg.png",
-        "Union Berlin": "bundesliga/Union Berlin.png",
-        "Werder Bremen": "bundesliga/Brême.png",
-        "Borussia Mönchengladbach": "bundesliga/M_gladbach.png",
-        "VfL Wolfsburg": "bundesliga/Wolfsbourg.png",
-        "Mainz 05": "bundesliga/Mayence.png",
-        "FC Köln": "bundesliga/Cologne.png",
-        "Hoffenheim": "bundesliga/Hoffenheim.png",
-        "FC Augsburg": "bundesliga/Augsbourg.png",
-        "VfL Bochum": "bundesliga/Bochum.png",
-        "Heidenheim": "bundesliga/Heidenheim.png",
-        "Darmstadt": "bundesliga/Darmstadt.png",
-        
-        "Juventus": "serie_a/Juventus.png",
-        "Inter": "serie_a/Inter Milan.png",
-        "AC Milan": "serie_a/Milan.png",
-        "Napoli": "serie_a/Naples.png",
-        "Roma": "serie_a/Rome.png",
-        "Lazio": "serie_a/Lazio.png",
-        "Atalanta": "serie_a/Atalanta.png",
-        "Fiorentina": "serie_a/Fiorentina.png",
-        "Torino": "serie_a/Torino.png",
-        "Bologna": "serie_a/Bologne.png",
-        "Sassuolo": "serie_a/Sassuolo.png",
-        "Monza": "serie_a/Monza.png",
-        "Udinese": "serie_a/Udinese.png",
-        "Genoa": "serie_a/Genoa.png",
-        "Lecce": "serie_a/Lecce.png",
-        "Empoli": "serie_a/Empoli.png",
-        "Cagliari": "serie_a/Cagliari.png",
-        "Hellas Verona": "serie_a/Hellas.png",
-        "Salernitana": "serie_a/Salernitana.png",
-        "Frosinone": "serie_a/Frosinone.png",
-        
-        "Paris S-G": "ligue_1/PSG.png",
-        "Marseille": "ligue_1/Marseille.png",
-        "Monaco": "ligue_1/Monaco.png",
-        "Lyon": "ligue_1/Lyon.png",
-        "Lille": "ligue_1/Lille.png",
-        "Nice": "ligue_1/Nice.png",
-        "Rennes": "ligue_1/Rennes.png",
-        "Lens": "ligue_1/Lens.png",
-        "Nantes": "ligue_1/Nantes.png",
-        "Strasbourg": "ligue_1/Strasbourg.png",
-        "Montpellier": "ligue_1/Montpellier.png",
-        "Reims": "ligue_1/Reims.png",
-        "Toulouse": "ligue_1/Toulouse.png",
-        "Brest": "ligue_1/Brest.png",
-        "Le Havre": "ligue_1/Le Havre.png",
-        "Lorient": "ligue_1/Lorient.png",
-        "Metz": "ligue_1/Metz.png",
-        "Clermont": "ligue_1/Clermont.png"
-    }
-    
-    logo_path = club_mapping.get(club_name)
-    if logo_path:
-        full_path = f"logos/{logo_path}"
-        if os.path.exists(full_path):
-            return full_path
-    return None
+    return resolve_club_logo(club_name)
 
 def get_league_logo(league_name):
     import os
@@ -155,84 +51,54 @@ def get_country_flag(country_name):
 
 @st.cache_data
 def load_data():
-    top5_players = pd.read_csv('datas_cleaned/top5-players.csv')
-    defensive = pd.read_csv('datas_cleaned/Defensive.csv')
-    passing = pd.read_csv('datas_cleaned/Passing.csv')
-    keepers = pd.read_csv('datas_cleaned/keepers.csv')
-    players_positions = pd.read_csv('datas_cleaned/players_positions.csv')
-    premier_league_positions = pd.read_csv('datas_cleaned/premier_league_players_positions.csv')
-    bundesliga_positions = pd.read_csv('datas_cleaned/bundesliga_players_positions.csv')
-    liga_positions = pd.read_csv('datas_cleaned/liga_players_positions.csv')
-    ligue_1_positions = pd.read_csv('datas_cleaned/ligue_1_players_positions.csv')
-    serie_a_positions = pd.read_csv('datas_cleaned/serie_a_players_positions.csv')
-    
-    all_positions = pd.concat([
-        players_positions,
-        premier_league_positions,
-        bundesliga_positions,
-        liga_positions,
-        ligue_1_positions,
-        serie_a_positions
-    ], ignore_index=True).drop_duplicates(subset=['Name'])
-    
-    defensive = defensive.rename(columns={'Col_1': 'Player'})
-    passing = passing.rename(columns={'Col_1': 'Player'})
-    keepers = keepers.rename(columns={
-        'Col_1': 'Player', 
-        'Col_2': 'Nation', 
-        'Col_4': 'Squad', 
-        'Col_5': 'Comp', 
-        'Col_6': 'Age',
-        'Playing Time.2': 'Min',
-        'Performance': 'GA',
-        'Performance.1': 'GA90',
-        'Performance.2': 'SoTA',
-        'Performance.3': 'Saves',
-        'Performance.4': 'Save%',
-        'Performance.5': 'W',
-        'Performance.6': 'D',
-        'Performance.7': 'L',
-        'Performance.8': 'CS',
-        'Performance.9': 'CS%',
-        'Playing Time': 'MP',
-        'Playing Time.1': 'Starts'
-    })
-    
-    return top5_players, defensive, passing, keepers, all_positions
+    crosswalk = load_crosswalk()
+    keepers = attach_player_ids(load_table('keepers.csv'), 'keepers.csv', crosswalk)
+    
+    profiles = load_player_profiles(crosswalk)
+    player_index = build_player_index(profiles, keepers)
+    player_scores = compute_player_scores(profiles)
+    
+    return keepers, profiles, player_index, player_scores
+
+@st.cache_resource
+def load_similarity_index():
+    _, profiles, _, player_scores = load_data()
+    return build_similarity_index(profiles, player_scores)
+
+def build_player_index(profiles_df, keepers_df):
+    """Index player_id -> position de sa première ligne dans chaque table."""
+    def first_positions(df):
+        index = {}
+        if 'player_id' in df.columns:
+            for pos, player_id in enumerate(df['player_id'].tolist()):
+                if pd.notna(player_id):
+                    index.setdefault(player_id, pos)
+        return index
+    
+    return {
+        'keepers': first_positions(keepers_df),
+        'profiles': first_positions(profiles_df)
+    }
+
+def player_labels(players_df):
+    """player_id -> nom affiché (avec le club quand plusieurs joueurs portent le même nom)."""
+    homonyms = players_df['Player'].duplicated(keep=False)
+    labels = players_df['Player'].where(~homonyms, players_df['Player'] + " (" + players_df['Squad'].fillna('?') + ")")
+    return dict(zip(players_df['player_id'], labels))
 
-def get_player_stats(player_name, top5_df, defensive_df, passing_df, keepers_df, positions_df):
+def get_player_stats(player_id, profiles_df, keepers_df, player_index, scores_df=None):
     player_data = {}
     
-    if 'Player' in keepers_df.columns:
-        keepers_match = keepers_df[keepers_df['Player'] == player_name]
-        if not keepers_match.empty:
-            player_data['goalkeeper'] = keepers_match.iloc[0]
-            return player_data
-    
-    top5_match = top5_df[top5_df['Player'] == player_name]
-    defensive_match = defensive_df[defensive_df['Player'] == player_name]
-    passing_match = passing_df[passing_df['Player'] == player_name]
-    position_match = positions_df[positions_df['Name'] == player_name]
+    keepers_pos = player_index['keepers'].get(player_id)
+    if keepers_pos is not None:
+        player_data['goalkeeper'] = keepers_df.iloc[keepers_pos]
+        return player_data
     
-    if not top5_match.empty:
-        player_stats = top5_match.iloc[0].to_dict()
-        
-        if not position_match.empty:
-            player_stats['Detailed_Position'] = position_match.iloc[0]['Position']
-        
-        if not defensive_match.empty:
-            defensive_stats = defensive_match.iloc[0].to_dict()
-            for key, value in defensive_stats.items():
-                if key not in player_stats or pd.isna(player_stats.get(key)):
-                    player_stats[f"def_{key}"] = value
-        
-        if not passing_match.empty:
-            passing_stats = passing_match.iloc[0].to_dict()
-            for key, value in passing_stats.items():
-                if key not in player_stats or pd.isna(player_stats.get(key)):
-                    player_stats[f"pass_{key}"] = value
-        
-        player_data['general'] = pd.Series(player_stats)
+    profile_pos = player_index['profiles'].get(player_id)
+    if profile_pos is not None:
+        player_data['general'] = profiles_df.iloc[profile_pos]
+        if scores_df is not None:
+            player_data['scores'] = scores_df.iloc[profile_pos]
     
     return player_data
 
@@ -332,51 +198,11 @@ def create_fifa_style_radar(player_data, player_name):
     
     if 'general' in player_data:
         info = player_data['general']
-        position = info.get('Detailed_Position', info.get('Pos', 'Unknown'))
+        scores = player_data.get('scores')
+        if scores is None:
+            scores = compute_player_scores(info.to_frame().T).iloc[0]
         
-        def safe_get(key, default=0, multiplier=1):
-            value = info.get(key, default)
-            try:
-                return float(value) * multiplier if pd.notna(value) else default
-            except (ValueError, TypeError):
-                return default
-        
-        if position in ['BU', 'AG', 'AD', 'MOG', 'MOD']:
-            stats = {
-                'Pace': min(100, (safe_get('PrgR', 0, 3) + safe_get('PrgC', 0, 2)) / 2),
-                'Shooting': min(100, safe_get('Gls_90', 0, 25) + safe_get('xG_90', 0, 20) + safe_get('G+A_90', 0, 15)),
-                'Passing': min(100, (safe_get('Ast_90', 0, 30) + safe_get('pass_Cmp%', 0, 0.6) + safe_get('pass_xA', 0, 20)) / 2),
-                'Dribbling': min(100, safe_get('PrgR', 0, 4) + safe_get('PrgC', 0, 3) + safe_get('pass_KP', 0, 3)),
-                'Defending': min(100, (safe_get('def_Tkl', 0, 1) + safe_get('def_Int', 0, 1)) / 2),
-                'Physical': min(100, (safe_get('Min', 0, 0.04) + safe_get('90s', 0, 6) + (12 - safe_get('CrdY', 0))) / 3)
-            }
-        elif position in ['MDC', 'MC', 'MOC', 'MG', 'MD']:
-            stats = {
-                'Pace': min(100, (safe_get('PrgR', 0, 2) + safe_get('PrgC', 0, 2.5)) / 2),
-                'Shooting': min(100, safe_get('Gls_90', 0, 20) + safe_get('xG_90', 0, 15) + safe_get('G+A_90', 0, 10)),
-                'Passing': min(100, (safe_get('Ast_90', 0, 25) + safe_get('pass_Cmp%', 0, 0.9) + safe_get('pass_xA', 0, 15) + safe_get('pass_PrgP', 0, 1)) / 3),
-                'Dribbling': min(100, safe_get('PrgR', 0, 3) + safe_get('PrgC', 0, 2) + safe_get('pass_KP', 0, 2)),
-                'Defending': min(100, (safe_get('def_Tkl', 0, 2.5) + safe_get('def_Int', 0, 2.5) + safe_get('def_Blocks', 0, 4)) / 2),
-                'Physical': min(100, (safe_get('Min', 0, 0.03) + safe_get('90s', 0, 5) + (10 - safe_get('CrdY', 0))) / 2)
-            }
-        elif position in ['DG', 'DD', 'DC', 'DL', 'DR']:
-            stats = {
-                'Pace': min(100, (safe_get('PrgR', 0, 1.5) + safe_get('PrgC', 0, 2)) / 2),
-                'Shooting': min(100, safe_get('Gls_90', 0, 15) + safe_get('xG_90', 0, 10)),
-                'Passing': min(100, (safe_get('Ast_90', 0, 20) + safe_get('pass_Cmp%', 0, 1) + safe_get('pass_PrgP', 0, 1.5)) / 2),
-                'Dribbling': min(100, safe_get('PrgR', 0, 2) + safe_get('PrgC', 0, 1.5)),
-                'Defending': min(100, (safe_get('def_Tkl', 0, 3) + safe_get('def_Int', 0, 3) + safe_get('def_Blocks', 0, 4) + safe_get('def_Clr', 0, 1)) / 3),
-                'Physical': min(100, (safe_get('Min', 0, 0.03) + safe_get('90s', 0, 5) + (12 - safe_get('CrdY', 0))) / 2)
-            }
-        else:
-            stats = {
-                'Pace': min(100, (safe_get('PrgR', 0, 2) + safe_get('PrgC', 0, 2)) / 2),
-                'Shooting': min(100, safe_get('Gls_90', 0, 20) + safe_get('xG_90', 0, 15) + safe_get('G+A_90', 0, 10)),
-                'Passing': min(100, (safe_get('Ast_90', 0, 25) + safe_get('pass_Cmp%', 0, 0.8) + safe_get('pass_xA', 0, 15)) / 2),
-                'Dribbling': min(100, safe_get('PrgR', 0, 3) + safe_get('PrgC', 0, 2) + safe_get('pass_KP', 0, 2)),
-                'Defending': min(100, (safe_get('def_Tkl', 0, 2) + safe_get('def_Int', 0, 2) + safe_get('def_Blocks', 0, 3)) / 2),
-                'Physical': min(100, (safe_get('Min', 0, 0.03) + safe_get('90s', 0, 5) + (10 - safe_get('CrdY', 0))) / 2)
-            }
+        stats = {rating: scores[rating] for rating in RATINGS}
         
         categories = list(stats.keys())
         values = list(stats.values())
@@ -462,27 +288,11 @@ def create_comparison_radar(players_data):
     
     for i, (player_name, data) in enumerate(players_data.items()):
         if 'general' in data:
-            info = data['general']
-            
-            def safe_get_comp(key, default=0):
-                value = info.get(key, default)
-                try:
-                    return float(value) if pd.notna(value) else default
-                except (ValueError, TypeError):
-                    return default
+            scores = data.get('scores')
+            if scores is None:
+                scores = compute_player_scores(data['general'].to_frame().T).iloc[0]
             
-            stats = {
-                'Goals/90': round(safe_get_comp('Gls_90', 0), 2),
-                'Assists/90': round(safe_get_comp('Ast_90', 0), 2),
-                'xG/90': round(safe_get_comp('xG_90', 0), 2),
-                'xA/90': round(safe_get_comp('xAG_90', 0), 2),
-                'Progressive Actions': round((safe_get_comp('PrgC', 0) + safe_get_comp('PrgP', 0)) / 20, 2),
-                'Tackles': round(safe_get_comp('def_Tkl', 0) / 5, 2),
-                'Interceptions': round(safe_get_comp('def_Int', 0) / 5, 2),
-                'Pass Completion%': round(safe_get_comp('pass_Cmp%', 0) / 10, 2),
-                'Key Passes': round(safe_get_comp('pass_KP', 0) / 5, 2),
-                'Blocks': round(safe_get_comp('def_Blocks', 0) / 3, 2)
-            }
+            stats = {metric: scores[metric] for metric in COMPARISON_METRICS}
             
         elif 'goalkeeper' in data:
             info = data['goalkeeper']
@@ -573,23 +383,19 @@ def show_players():
     """Fonction principale pour afficher la page des joueurs"""
     st.title("⚽ Soccer Stats Players Dashboard")
     
-    top5_df, defensive_df, passing_df, keepers_df, positions_df = load_data()
+    keepers_df, profiles_df, player_index, scores_df = load_data()
     
-    all_players_df = top5_df[['Player', 'Nation', 'Pos', 'Squad', 'Comp']].copy()
-    
-    all_players_df = all_players_df.merge(
-        positions_df.rename(columns={'Name': 'Player', 'Position': 'Detailed_Position'}),
-        on='Player', 
-        how='left'
-    )
+    all_players_df = profiles_df[['player_id', 'Player', 'Nation', 'Pos', 'Squad', 'Comp', 'Detailed_Position']].copy()
     
     if 'Player' in keepers_df.columns:
-        keepers_for_filter = keepers_df[['Player', 'Nation', 'Squad', 'Comp']].copy()
+        keepers_for_filter = keepers_df[['player_id', 'Player', 'Nation', 'Squad', 'Comp']].copy()
         keepers_for_filter['Pos'] = 'GK'
         keepers_for_filter['Detailed_Position'] = 'GK'
         all_players_df = pd.concat([all_players_df, keepers_for_filter], ignore_index=True)
     
-    all_players_df = all_players_df.drop_duplicates(subset=['Player'])
+    all_players_df = all_players_df.dropna(subset=['player_id']).drop_duplicates(subset=['player_id'])
+    labels = player_labels(all_players_df)
+    player_ids = {label: player_id for player_id, label in labels.items()}
     
     st.header("🔍 Advanced Filters")
     
@@ -645,13 +451,13 @@ def show_players():
         filtered_df = filtered_df[filtered_df['Nation'] == selected_nation]
     
     if not filtered_df.empty:
-        player_names = filtered_df['Player'].tolist()
+        player_names = [labels[player_id] for player_id in filtered_df['player_id']]
         
         st.header("👤 Player Selection")
         selected_player = st.selectbox("Select a player to analyze", [""] + player_names)
         
         if selected_player:
-            player_data = get_player_stats(selected_player, top5_df, defensive_df, passing_df, keepers_df, positions_df)
+            player_data = get_player_stats(player_ids[selected_player], profiles_df, keepers_df, player_index, scores_df)
             
             st.header(f"📊 {selected_player} - Player Analysis")
             
@@ -717,6 +523,25 @@ def show_players():
                         'Expected Assists': safe_display_get('pass_xA')
                     }
                     st.bar_chart(pass_data)
+                
+                st.subheader("🔎 Similar Players")
+                sim_col1, sim_col2, sim_col3 = st.columns(3)
+                with sim_col1:
+                    nb_similar = st.slider("Number of similar players", 3, 15, 5)
+                with sim_col2:
+                    same_league = st.checkbox("Same league only")
+                with sim_col3:
+                    same_position = st.checkbox("Same position only")
+                
+                detailed_pos = info.get('Detailed_Position')
+                similar_df = find_similar_players(
+                    load_similarity_index(),
+                    player_ids[selected_player],
+                    k=nb_similar,
+                    league=info.get('Comp') if same_league else None,
+                    position=detailed_pos if same_position and pd.notna(detailed_pos) else None
+                )
+                st.dataframe(similar_df, hide_index=True, use_container_width=True)
             
             elif 'goalkeeper' in player_data:
                 info = player_data['goalkeeper']
@@ -781,7 +606,7 @@ def show_players():
             if len(comparison_players) >= 2:
                 st.success(f"✅ Comparing {len(comparison_players)} players")
                 for i, player in enumerate(comparison_players, 1):
-                    player_stats = get_player_stats(player, top5_df, defensive_df, passing_df, keepers_df, positions_df)
+                    player_stats = get_player_stats(player_ids[player], profiles_df, keepers_df, player_index, scores_df)
                     if player_stats and ('general' in player_stats or 'goalkeeper' in player_stats):
                         info = player_stats.get('general', player_stats.get('goalkeeper', {}))
                         club_name = info.get('Squad', '')
@@ -805,7 +630,7 @@ def show_players():
         if len(comparison_players) > 1:
             players_data = {}
             for player in comparison_players:
-                players_data[player] = get_player_stats(player, top5_df, defensive_df, passing_df, keepers_df, positions_df)
+                players_data[player] = get_player_stats(player_ids[player], profiles_df, keepers_df, player_index, scores_df)
             
             st.subheader("📈 Interactive Comparison Chart")
             st.plotly_chart(
@@ -945,7 +770,7 @@ def show_players():
     with st.sidebar:
         st.header("📈 Dataset Statistics")
         st.metric("Total Players", len(all_players_df))
-        st.metric("Field Players", len(top5_df))
+        st.metric("Field Players", len(profiles_df))
         st.metric("Goalkeepers", len(keepers_df))
         st.metric("Leagues", len(all_players_df['Comp'].unique()))
         st.metric("Teams", len(all_players_df['Squad'].unique()))
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+RATINGS = ['Pace', 'Shooting', 'Passing', 'Dribbling', 'Defending', 'Physical']
+
+POSITION_GROUPS = {
+    'attack': ['BU', 'AG', 'AD', 'MOG', 'MOD'],
+    'midfield': ['MDC', 'MC', 'MOC', 'MG', 'MD'],
+    'defense': ['DG', 'DD', 'DC', 'DL', 'DR'],
+    'other': []
+}
+
+# Par groupe de postes : note -> (poids par stat, constante, diviseur)
+# note = min(100, (constante + somme(poids * stat)) / diviseur), stat manquante = 0
+RATING_WEIGHTS = {
+    'attack': {
+        'Pace': ({'PrgR': 3, 'PrgC': 2}, 0, 2),
+        'Shooting': ({'Gls_90': 25, 'xG_90': 20, 'G+A_90': 15}, 0, 1),
+        'Passing': ({'Ast_90': 30, 'pass_Cmp%': 0.6, 'pass_xA': 20}, 0, 2),
+        'Dribbling': ({'PrgR': 4, 'PrgC': 3, 'pass_KP': 3}, 0, 1),
+        'Defending': ({'def_Tkl': 1, 'def_Int': 1}, 0, 2),
+        'Physical': ({'Min': 0.04, '90s': 6, 'CrdY': -1}, 12, 3)
+    },
+    'midfield': {
+        'Pace': ({'PrgR': 2, 'PrgC': 2.5}, 0, 2),
+        'Shooting': ({'Gls_90': 20, 'xG_90': 15, 'G+A_90': 10}, 0, 1),
+        'Passing': ({'Ast_90': 25, 'pass_Cmp%': 0.9, 'pass_xA': 15, 'pass_PrgP': 1}, 0, 3),
+        'Dribbling': ({'PrgR': 3, 'PrgC': 2, 'pass_KP': 2}, 0, 1),
+        'Defending': ({'def_Tkl': 2.5, 'def_Int': 2.5, 'def_Blocks': 4}, 0, 2),
+        'Physical': ({'Min': 0.03, '90s': 5, 'CrdY': -1}, 10, 2)
+    },
+    'defense': {
+        'Pace': ({'PrgR': 1.5, 'PrgC': 2}, 0, 2),
+        'Shooting': ({'Gls_90': 15, 'xG_90': 10}, 0, 1),
+        'Passing': ({'Ast_90': 20, 'pass_Cmp%': 1, 'pass_PrgP': 1.5}, 0, 2),
+        'Dribbling': ({'PrgR': 2, 'PrgC': 1.5}, 0, 1),
+        'Defending': ({'def_Tkl': 3, 'def_Int': 3, 'def_Blocks': 4, 'def_Clr': 1}, 0, 3),
+        'Physical': ({'Min': 0.03, '90s': 5, 'CrdY': -1}, 12, 2)
+    },
+    'other': {
+        'Pace': ({'PrgR': 2, 'PrgC': 2}, 0, 2),
+        'Shooting': ({'Gls_90': 20, 'xG_90': 15, 'G+A_90': 10}, 0, 1),
+        'Passing': ({'Ast_90': 25, 'pass_Cmp%': 0.8, 'pass_xA': 15}, 0, 2),
+        'Dribbling': ({'PrgR': 3, 'PrgC': 2, 'pass_KP': 2}, 0, 1),
+        'Defending': ({'def_Tkl': 2, 'def_Int': 2, 'def_Blocks': 3}, 0, 2),
+        'Physical': ({'Min': 0.03, '90s': 5, 'CrdY': -1}, 10, 2)
+    }
+}
+
+# Axes du radar de comparaison (même forme linéaire, sans plafond, arrondis à 2 décimales)
+COMPARISON_WEIGHTS = {
+    'Goals/90': ({'Gls_90': 1}, 0, 1),
+    'Assists/90': ({'Ast_90': 1}, 0, 1),
+    'xG/90': ({'xG_90': 1}, 0, 1),
+    'xA/90': ({'xAG_90': 1}, 0, 1),
+    'Progressive Actions': ({'PrgC': 1, 'PrgP': 1}, 0, 20),
+    'Tackles': ({'def_Tkl': 1}, 0, 5),
+    'Interceptions': ({'def_Int': 1}, 0, 5),
+    'Pass Completion%': ({'pass_Cmp%': 1}, 0, 10),
+    'Key Passes': ({'pass_KP': 1}, 0, 5),
+    'Blocks': ({'def_Blocks': 1}, 0, 3)
+}
+COMPARISON_METRICS = list(COMPARISON_WEIGHTS)
+
+def stat_matrix(df, columns):
+    """Matrice (joueurs x stats) en float, valeurs manquantes ou non numériques à 0."""
+    matrix = np.zeros((len(df), len(columns)))
+    for j, col in enumerate(columns):
+        if col in df.columns:
+            matrix[:, j] = pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy(dtype=float)
+    return matrix
+
+def _weight_table(table, features):
+    feature_pos = {col: j for j, col in enumerate(features)}
+    weights = np.zeros((len(table), len(features)))
+    constants = np.zeros(len(table))
+    divisors = np.ones(len(table))
+    for i, (terms, constant, divisor) in enumerate(table.values()):
+        for col, weight in terms.items():
+            weights[i, feature_pos[col]] = weight
+        constants[i] = constant
+        divisors[i] = divisor
+    return weights, constants, divisors
+
+def _features(tables):
+    return sorted({col for table in tables for terms, _, _ in table.values() for col in terms})
+
+def position_groups(df):
+    """Groupe de postes de chaque joueur (poste détaillé, sinon poste FBref)."""
+    if 'Detailed_Position' in df.columns:
+        positions = df['Detailed_Position']
+    else:
+        positions = df.get('Pos', pd.Series('Unknown', index=df.index))
+    group_of = {pos: group for group, group_positions in POSITION_GROUPS.items() for pos in group_positions}
+    return positions.map(group_of).fillna('other').to_numpy()
+
+def compute_ratings(profiles_df):
+    """Les six notes FIFA de tous les joueurs en une passe, selon les poids de leur groupe de postes."""
+    features = _features(RATING_WEIGHTS.values())
+    stats = stat_matrix(profiles_df, features)
+    groups = position_groups(profiles_df)
+
+    values = np.zeros((len(profiles_df), len(RATINGS)))
+    for group, table in RATING_WEIGHTS.items():
+        rows = groups == group
+        if not rows.any():
+            continue
+        weights, constants, divisors = _weight_table({r: table[r] for r in RATINGS}, features)
+        values[rows] = (stats[rows] @ weights.T + constants) / divisors
+
+    return pd.DataFrame(np.minimum(values, 100), columns=RATINGS, index=profiles_df.index)
+
+def compute_comparison_metrics(profiles_df):
+    """Axes du radar de comparaison pour tous les joueurs."""
+    features = _features([COMPARISON_WEIGHTS])
+    weights, constants, divisors = _weight_table(COMPARISON_WEIGHTS, features)
+    values = (stat_matrix(profiles_df, features) @ weights.T + constants) / divisors
+    # round() Python plutôt que np.round pour garder exactement les arrondis affichés jusqu'ici
+    rounded = [[round(value, 2) for value in row] for row in values.tolist()]
+    return pd.DataFrame(rounded, columns=COMPARISON_METRICS, index=profiles_df.index)
+
+def compute_player_scores(profiles_df):
+    """Notes FIFA + axes de comparaison, alignés ligne à ligne sur profiles_df."""
+    return pd.concat([compute_ratings(profiles_df), compute_comparison_metrics(profiles_df)], axis=1)
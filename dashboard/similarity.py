@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import NearestNeighbors
+from ratings import RATINGS, stat_matrix
+
+# Stats par 90 minutes + les six notes du radar FIFA
+PER_90_FEATURES = ['Gls_90', 'Ast_90', 'xG_90', 'xAG_90', 'npxG_90', 'G-PK_90']
+SIMILARITY_FEATURES = PER_90_FEATURES + RATINGS
+
+def standardize(matrix):
+    """Centre-réduit chaque colonne (les colonnes constantes restent à 0)."""
+    mean = matrix.mean(axis=0)
+    std = matrix.std(axis=0)
+    std[std == 0] = 1
+    return (matrix - mean) / std
+
+def build_similarity_index(profiles_df, scores_df):
+    """Matrice standardisée des joueurs de champ + index des plus proches voisins (exact)."""
+    features = pd.concat([profiles_df, scores_df[RATINGS]], axis=1)
+    matrix = standardize(stat_matrix(features, SIMILARITY_FEATURES))
+    model = NearestNeighbors(metric='euclidean').fit(matrix)
+
+    positions = profiles_df['Detailed_Position'] if 'Detailed_Position' in profiles_df.columns else profiles_df['Pos']
+    return {
+        'matrix': matrix,
+        'model': model,
+        'players': profiles_df['Player'].to_numpy(),
+        'squads': profiles_df['Squad'].to_numpy(),
+        'leagues': profiles_df['Comp'].to_numpy(),
+        'positions': positions.to_numpy(),
+        'row_of': {player_id: pos for pos, player_id in reversed(list(enumerate(profiles_df['player_id'].tolist())))}
+    }
+
+def find_similar_players(index, player_id, k=5, league=None, position=None):
+    """Les k joueurs les plus proches de player_id, éventuellement filtrés par ligue et/ou poste."""
+    row = index['row_of'].get(player_id)
+    if row is None:
+        return pd.DataFrame(columns=['Player', 'Squad', 'Comp', 'Position', 'Distance'])
+
+    keep = np.ones(len(index['players']), dtype=bool)
+    keep[row] = False
+    if league is not None:
+        keep &= index['leagues'] == league
+    if position is not None:
+        keep &= index['positions'] == position
+
+    # On élargit la recherche jusqu'à avoir k voisins qui passent les filtres
+    total = len(index['players'])
+    n_neighbors = min(total, (k + 1) * 4)
+    while True:
+        distances, rows = index['model'].kneighbors(index['matrix'][row:row + 1], n_neighbors=n_neighbors)
+        distances, rows = distances[0], rows[0]
+        matches = keep[rows]
+        if matches.sum() >= k or n_neighbors == total:
+            break
+        n_neighbors = min(total, n_neighbors * 4)
+
+    distances, rows = distances[matches][:k], rows[matches][:k]
+    return pd.DataFrame({
+        'Player': index['players'][rows],
+        'Squad': index['squads'][rows],
+        'Comp': index['leagues'][rows],
+        'Position': index['positions'][rows],
+        'Distance': distances.round(3)
+    })
@@ -1,178 +1,314 @@
 import pandas as pd
 import numpy as np
+import argparse
+import hashlib
+import json
 import os
-import shutil
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+dashboard_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard')
+if dashboard_path not in sys.path:
+    sys.path.insert(0, dashboard_path)
+
+from data_loader import resolve_dtype, write_atomic, write_columnar
+from sketches import DEFAULT_CAPACITY, Moments, QuantileSketch
+from player_ids import CROSSWALK_FILE, write_crosswalk
+from player_profiles import PROFILES_FILE, write_player_profiles
+
+INPUT_DIR = 'datas'
+OUTPUT_DIR = 'datas_cleaned'
+
+# À incrémenter quand le nettoyage change : tous les fichiers seront retraités
+PIPELINE_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
 def create_cleaned_directory():
-    if os.path.exists('datas_cleaned'):
-        shutil.rmtree('datas_cleaned')
-    os.makedirs('datas_cleaned')
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest():
+    """Empreinte et version du pipeline de chaque fichier d'entrée déjà nettoyé."""
+    path = os.path.join(OUTPUT_DIR, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest):
+    def write(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+    write_atomic(os.path.join(OUTPUT_DIR, MANIFEST_FILE), write)
+
+def is_up_to_date(entry, digest, outlier_groups=None, player_key=None):
+    return (
+        entry is not None
+        and entry.get('sha256') == digest
+        and entry.get('pipeline_version') == PIPELINE_VERSION
+        and entry.get('outlier_groups') == (outlier_groups or None)
+        and entry.get('player_key') == (player_key or None)
+        and os.path.exists(os.path.join(OUTPUT_DIR, entry.get('output', '')))
+    )
 
-def detect_and_clean_duplicates(df, is_keeper=False):
+def save_cleaned(cleaned_df, filename):
+    output_path = os.path.join(OUTPUT_DIR, filename)
+    if filename.endswith('.xlsx'):
+        write_atomic(output_path, lambda path: cleaned_df.to_excel(path, index=False))
+    else:
+        write_atomic(output_path, lambda path: cleaned_df.to_csv(path, index=False))
+        if write_columnar(filename, OUTPUT_DIR):
+            print(f"✓ {filename} columnar copy saved")
+
+# Clé d'un joueur pour l'agrégation des doublons ; le premier élément est le nom
+# (ex. ['Player', 'Born'] pour séparer les homonymes)
+PLAYER_KEY = ['Player']
+# Colonnes numériques dont on garde la première valeur au lieu de la somme
+FIRST_VALUE_COLUMNS = ['Age', 'Born', 'Rk']
+
+def player_key_columns(df, key=None):
+    """Colonnes de la clé joueur présentes dans df, ou [] si le nom manque."""
+    key = list(key or PLAYER_KEY)
+    if key[0] not in df.columns:
+        return []
+    return [col for col in key if col in df.columns]
+
+def detect_and_clean_duplicates(df, key=None):
     if df.empty:
         return df
     
-    if 'Player' not in df.columns:
+    key = player_key_columns(df, key)
+    if not key:
         return df.drop_duplicates()
     
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    
-    if is_keeper:
-        if len(df[df.duplicated(['Player'], keep=False)]) > 0:
-            agg_dict = {}
-            for col in numeric_cols:
-                if col in ['Age', 'Born', 'Rk']:
-                    agg_dict[col] = 'first'
-                else:
-                    agg_dict[col] = 'sum'
-            
-            for col in df.columns:
-                if col not in numeric_cols and col != 'Player':
-                    agg_dict[col] = 'first'
-            
-            df = df.groupby('Player').agg(agg_dict).reset_index()
-    else:
-        if len(df[df.duplicated(['Player'], keep=False)]) > 0:
-            agg_dict = {}
-            for col in numeric_cols:
-                if col in ['Age', 'Born', 'Rk']:
-                    agg_dict[col] = 'first'
-                else:
-                    agg_dict[col] = 'sum'
-            
-            for col in df.columns:
-                if col not in numeric_cols and col != 'Player':
-                    agg_dict[col] = 'first'
-            
-            df = df.groupby('Player').agg(agg_dict).reset_index()
+    if df.duplicated(key).any():
+        df = aggregate_players(df, key)
     
     return df
 
-def identify_outliers(df, method='iqr'):
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    outliers_info = {}
-    
-    for col in numeric_cols:
-        if col in ['Age', 'Born', 'Rk']:
-            continue
-            
-        values = df[col].dropna()
-        if len(values) == 0:
-            continue
-            
-        if method == 'iqr':
-            Q1 = values.quantile(0.25)
-            Q3 = values.quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            outliers = values[(values < lower_bound) | (values > upper_bound)]
-        else:
-            mean = values.mean()
-            std = values.std()
-            outliers = values[np.abs(values - mean) > 3 * std]
-        
-        if len(outliers) > 0:
-            outliers_info[col] = len(outliers)
-    
-    return outliers_info
+def aggregate_players(df, key=None, numeric_cols=None):
+    """Une ligne par joueur, triée par clé : somme des stats, première valeur non vide des autres colonnes.
+
+    Les lignes sans nom sont ignorées ; numeric_cols permet d'imposer les colonnes à sommer
+    (mode streaming, où les types viennent du fichier entier).
+    """
+    key = list(key or PLAYER_KEY)
+    if numeric_cols is None:
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+    numeric_cols = [col for col in numeric_cols if col in df.columns and col not in key]
+    sum_cols = [col for col in numeric_cols if col not in FIRST_VALUE_COLUMNS]
+    other_cols = [col for col in df.columns if col not in key and col not in numeric_cols]
+    first_cols = [col for col in numeric_cols if col in FIRST_VALUE_COLUMNS] + other_cols
 
-def clean_outliers(df, method='iqr'):
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    df_cleaned = df.copy()
+    rows = df[df[key[0]].notna()]
+    grouped = rows.groupby(key, dropna=False)
+    # premières lignes de chaque joueur, triées par clé comme les groupes
+    firsts = rows.drop_duplicates(key).sort_values(key, kind='stable').set_index(key)[first_cols]
+    # mêmes groupes dans le même ordre : alignement par position, sûr même avec des clés NaN
+    sums = grouped[sum_cols].sum().set_axis(firsts.index)
+    # première valeur non vide, comme groupby.first : seules les colonnes à trous sont recalculées
+    gaps = firsts.columns[firsts.isna().any()]
+    if len(gaps):
+        firsts = firsts.fillna(grouped[list(gaps)].first().set_axis(firsts.index))
     
-    for col in numeric_cols:
-        if col in ['Age', 'Born', 'Rk']:
-            continue
-            
-        values = df_cleaned[col].dropna()
-        if len(values) == 0:
-            continue
-            
-        if method == 'iqr':
-            Q1 = values.quantile(0.25)
-            Q3 = values.quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            df_cleaned.loc[df_cleaned[col] < lower_bound, col] = lower_bound
-            df_cleaned.loc[df_cleaned[col] > upper_bound, col] = upper_bound
+    return pd.concat([sums, firsts], axis=1)[numeric_cols + other_cols].reset_index()
+
+# Colonnes numériques jamais écrêtées
+OUTLIER_EXCLUDED = ['Age', 'Born', 'Rk']
+
+def outlier_columns(df):
+    return [col for col in df.select_dtypes(include=[np.number]).columns if col not in OUTLIER_EXCLUDED]
+
+def outlier_bounds(values, method='iqr', keys=None):
+    """Bornes basse et haute de toutes les colonnes de values, en un seul calcul.
+
+    Sans keys : deux Series indexées par colonne. Avec keys (liste de Series de groupes) :
+    deux DataFrames, une ligne par groupe.
+    """
+    stats = values if keys is None else values.groupby(keys, dropna=False)
+    if method == 'iqr':
+        quantiles = stats.quantile([0.25, 0.75])
+        if keys is None:
+            q1, q3 = quantiles.loc[0.25], quantiles.loc[0.75]
         else:
-            mean = values.mean()
-            std = values.std()
-            lower_bound = mean - 3 * std
-            upper_bound = mean + 3 * std
-            
-            df_cleaned.loc[df_cleaned[col] < lower_bound, col] = lower_bound
-            df_cleaned.loc[df_cleaned[col] > upper_bound, col] = upper_bound
-    
-    return df_cleaned
+            q1, q3 = quantiles.xs(0.25, level=-1), quantiles.xs(0.75, level=-1)
+        iqr = q3 - q1
+        return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    mean, std = stats.mean(), stats.std()
+    return mean - 3 * std, mean + 3 * std
+
+def _is_integral(bounds):
+    bounds = np.asarray(bounds, dtype=float)
+    bounds = bounds[~np.isnan(bounds)]
+    return bool(np.all(bounds == np.round(bounds)))
+
+def clip_outliers(df, method='iqr', group_cols=None):
+    """Écrête les valeurs hors bornes de toutes les colonnes numériques en un seul passage.
+
+    method : 'iqr' (Q1 - 1.5 IQR, Q3 + 1.5 IQR) ou 'sigma' (moyenne +/- 3 écarts-types).
+    group_cols : bornes calculées par groupe (ex. ['Pos'], ['Comp']) ; les colonnes absentes sont ignorées.
+    Retourne (df écrêté, rapport) ; le rapport donne lower, upper et le nombre de valeurs
+    écrêtées par colonne (et par groupe).
+    """
+    columns = outlier_columns(df)
+    group_cols = [col for col in (group_cols or []) if col in df.columns]
+    if df.empty or not columns:
+        return df, pd.DataFrame(columns=['lower', 'upper', 'outliers'])
+
+    values = df[columns]
+    if group_cols:
+        keys = [df[col] for col in group_cols]
+        lower, upper = outlier_bounds(values, method, keys)
+        # bornes de chaque ligne, selon le numéro de son groupe (les clés NaN ne se réindexent pas)
+        row_groups = df.groupby(group_cols, dropna=False).ngroup().to_numpy()
+        row_lower = lower.iloc[row_groups].set_axis(values.index)
+        row_upper = upper.iloc[row_groups].set_axis(values.index)
+        df_cleaned, is_outlier = apply_bounds(df, row_lower, row_upper, integral_columns(values, lower, upper))
+        counts = is_outlier.groupby(keys, dropna=False).sum()
+        # mêmes groupes dans le même ordre : assemblage par position, sans stack()
+        # (pandas 2 y retire les NaN d'un groupe dont une colonne est entièrement vide)
+        n_groups = len(lower.index)
+        index = pd.MultiIndex.from_arrays(
+            [lower.index.get_level_values(i).repeat(len(columns)) for i in range(lower.index.nlevels)]
+            + [np.tile(np.asarray(columns, dtype=object), n_groups)],
+            names=group_cols + ['column']
+        )
+        report = pd.DataFrame({
+            'lower': lower[columns].to_numpy().ravel(),
+            'upper': upper[columns].to_numpy().ravel(),
+            'outliers': counts[columns].to_numpy().ravel()
+        }, index=index)
+    else:
+        lower, upper = outlier_bounds(values, method)
+        df_cleaned, is_outlier = apply_bounds(df, lower, upper, integral_columns(values, lower, upper))
+        report = pd.DataFrame({'lower': lower, 'upper': upper, 'outliers': is_outlier.sum()})
+        report.index.name = 'column'
+    return df_cleaned, report
+
+def integral_columns(values, lower, upper):
+    """Colonnes entières dont toutes les bornes sont entières : elles restent entières une fois écrêtées.
+
+    Comme l'ancienne affectation .loc : une colonne d'entiers ne passe en float que si une borne ne l'est pas.
+    """
+    return {
+        col for col in values.columns
+        if pd.api.types.is_integer_dtype(values[col].dtype) and _is_integral(np.r_[lower[col], upper[col]])
+    }
+
+def apply_bounds(df, lower, upper, keep_int=()):
+    """Écrête les colonnes de lower/upper : Series par colonne, ou DataFrames de bornes par ligne.
+
+    Retourne (df écrêté, masque des valeurs écrêtées).
+    """
+    axis = 1 if isinstance(lower, pd.Series) else None
+    columns = list(lower.index if axis else lower.columns)
+    values = df[columns]
+    is_outlier = values.lt(lower, axis=1) | values.gt(upper, axis=1) if axis else values.lt(lower) | values.gt(upper)
+    clipped = values.clip(lower=lower, upper=upper, axis=axis)
+    for col in columns:
+        if pd.api.types.is_integer_dtype(values[col].dtype):
+            clipped[col] = clipped[col].astype(values[col].dtype if col in keep_int else 'float64')
+
+    return df.assign(**clipped), is_outlier
+
+def identify_outliers(df, method='iqr', group_cols=None):
+    """Nombre de valeurs hors bornes par colonne (colonnes sans outlier omises)."""
+    _, report = clip_outliers(df, method, group_cols)
+    counts = report.groupby(level='column', sort=False)['outliers'].sum()
+    return {col: int(n) for col, n in counts.items() if n > 0}
+
+def clean_outliers(df, method='iqr', group_cols=None):
+    return clip_outliers(df, method, group_cols)[0]
+
+def is_text(series):
+    return series.dtype in ['object', 'string']
 
 def handle_missing_values(df):
-    df_cleaned = df.copy()
+    missing_pct = df.isnull().sum() / len(df) * 100
+    medians = {
+        col: df[col].median() for col in df.columns
+        if 0 < missing_pct[col] <= 50 and not is_text(df[col])
+    }
+    return fill_missing(df, missing_pct, medians)
+
+def fill_missing(df, missing_pct, medians):
+    """Retire les colonnes vides à plus de 50 %, complète les autres ('Unknown' ou médiane).
+
+    Une seule suppression et un seul fillna pour toutes les colonnes.
+    """
+    df_cleaned = df.drop(columns=[col for col in df.columns if missing_pct[col] > 50])
     
+    fills = {}
     for col in df_cleaned.columns:
-        missing_pct = df_cleaned[col].isnull().sum() / len(df_cleaned) * 100
-        
-        if missing_pct > 50:
-            df_cleaned = df_cleaned.drop(columns=[col])
-        elif df_cleaned[col].dtype in ['object', 'string']:
-            df_cleaned[col] = df_cleaned[col].fillna('Unknown')
-        else:
-            if missing_pct > 0:
-                df_cleaned[col] = df_cleaned[col].fillna(df_cleaned[col].median())
+        if is_text(df_cleaned[col]):
+            fills[col] = 'Unknown'
+        elif missing_pct[col] > 0:
+            fills[col] = medians[col]
     
-    return df_cleaned
+    return df_cleaned.fillna(fills) if fills else df_cleaned
 
 def create_derived_variables(df, filename):
-    df_enhanced = df.copy()
+    # nouvelles colonnes ajoutées en une fois (celles calculées avant une erreur sont gardées)
+    derived = {}
     
     try:
-        if 'Born' in df_enhanced.columns:
+        if 'Born' in df.columns:
             current_year = datetime.now().year
-            df_enhanced['Calculated_Age'] = current_year - df_enhanced['Born']
+            derived['Calculated_Age'] = current_year - df['Born']
         
         if filename == 'top5-players.csv':
-            if 'Min' in df_enhanced.columns and 'Gls' in df_enhanced.columns:
-                df_enhanced['Goals_per_minute'] = df_enhanced['Gls'] / (df_enhanced['Min'] + 1)
+            if 'Min' in df.columns and 'Gls' in df.columns:
+                derived['Goals_per_minute'] = df['Gls'] / (df['Min'] + 1)
             
-            if 'Gls' in df_enhanced.columns and '90s' in df_enhanced.columns:
-                df_enhanced['Goals_per_90'] = df_enhanced['Gls'] / (df_enhanced['90s'] + 0.01)
+            if 'Gls' in df.columns and '90s' in df.columns:
+                derived['Goals_per_90'] = df['Gls'] / (df['90s'] + 0.01)
             
-            if 'Ast' in df_enhanced.columns and '90s' in df_enhanced.columns:
-                df_enhanced['Assists_per_90'] = df_enhanced['Ast'] / (df_enhanced['90s'] + 0.01)
+            if 'Ast' in df.columns and '90s' in df.columns:
+                derived['Assists_per_90'] = df['Ast'] / (df['90s'] + 0.01)
         
         if filename == 'Passing.csv':
-            if 'Cmp' in df_enhanced.columns and 'Att' in df_enhanced.columns:
-                df_enhanced['Pass_accuracy'] = df_enhanced['Cmp'] / (df_enhanced['Att'] + 1) * 100
+            if 'Cmp' in df.columns and 'Att' in df.columns:
+                derived['Pass_accuracy'] = df['Cmp'] / (df['Att'] + 1) * 100
         
         if filename == 'Defensive.csv':
-            if 'TklW' in df_enhanced.columns and 'Tkl' in df_enhanced.columns:
-                df_enhanced['Tackle_success_rate'] = df_enhanced['TklW'] / (df_enhanced['Tkl'] + 1) * 100
+            if 'TklW' in df.columns and 'Tkl' in df.columns:
+                derived['Tackle_success_rate'] = df['TklW'] / (df['Tkl'] + 1) * 100
         
         if filename == 'keepers.csv':
-            if 'Saves' in df_enhanced.columns and 'SoTA' in df_enhanced.columns:
-                df_enhanced['Save_percentage'] = df_enhanced['Saves'] / (df_enhanced['SoTA'] + 1) * 100
+            if 'Saves' in df.columns and 'SoTA' in df.columns:
+                derived['Save_percentage'] = df['Saves'] / (df['SoTA'] + 1) * 100
     except Exception as e:
         print(f"Warning: Could not create all derived variables for {filename}: {e}")
     
-    return df_enhanced
+    return df.assign(**derived) if derived else df
 
-def clean_column_names(df):
-    df_cleaned = df.copy()
-    
+def cleaned_column_names(columns):
     new_columns = []
-    for col in df_cleaned.columns:
+    for col in columns:
         if str(col).startswith('Unnamed:'):
             new_columns.append(f'Col_{len(new_columns)}')
         else:
             new_columns.append(str(col).strip())
-    
-    df_cleaned.columns = new_columns
+    return new_columns
+
+def clean_column_names(df):
+    df_cleaned = df.set_axis(cleaned_column_names(df.columns), axis=1)
     
     if 'Col_0' in df_cleaned.columns and df_cleaned['Col_0'].dtype == 'int64':
         df_cleaned = df_cleaned.drop(columns=['Col_0'])
@@ -189,38 +325,88 @@ def remove_specific_columns(df, filename):
 
 def remove_goalkeepers(df, filename):
     if filename != 'keepers.csv':
+        # un seul filtrage (et aucune copie s'il n'y a pas de gardien)
+        keep = pd.Series(True, index=df.index)
         if 'Pos' in df.columns:
-            df = df[df['Pos'] != 'GK']
+            keep &= df['Pos'] != 'GK'
         
         if 'Col_3' in df.columns:
-            df = df[df['Col_3'] != 'GK']
+            keep &= df['Col_3'] != 'GK'
+        
+        if not keep.all():
+            df = df[keep]
     
     return df
 
-def process_file(filepath, filename):
+class StageProfiler:
+    """Durée, mémoire encore allouée et pic mémoire de chaque étape.
+
+    Mesuré avec tracemalloc : allocations Python et NumPy (les chaînes stockées par Arrow n'y figurent pas).
+    """
+
+    def __init__(self):
+        self.stages = []
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+
+    def measure(self, name, func, *args):
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = func(*args)
+        current, peak = tracemalloc.get_traced_memory()
+        self.stages.append({'stage': name, 'seconds': time.perf_counter() - start,
+                            'current_mb': current / 2**20, 'peak_mb': peak / 2**20})
+        return result
+
+    def report(self, filename):
+        if self._started:
+            tracemalloc.stop()
+        lines = [f"  {s['stage']:<20} {s['seconds']:7.3f}s {s['current_mb']:9.1f} MB {s['peak_mb']:9.1f} MB peak"
+                 for s in self.stages]
+        print(f"Memory by stage for {filename}:\n" + "\n".join(lines))
+        return pd.DataFrame(self.stages)
+
+def cleaning_steps(filename, outlier_groups=None, method='iqr', player_key=None):
+    """Étapes du nettoyage d'un fichier, dans l'ordre : (nom, fonction DataFrame -> DataFrame)."""
+    def outliers(df):
+        df, outliers_report = clip_outliers(df, method, outlier_groups)
+        n_outliers = int(outliers_report['outliers'].sum())
+        if n_outliers:
+            print(f"✓ {filename} - {n_outliers} outliers cleaned")
+        return df
+
+    return [
+        ('column_names', clean_column_names),
+        ('specific_columns', lambda df: remove_specific_columns(df, filename)),
+        ('goalkeepers', lambda df: remove_goalkeepers(df, filename)),
+        ('duplicates', lambda df: detect_and_clean_duplicates(df, player_key)),
+        ('outliers', outliers),
+        ('missing_values', handle_missing_values),
+        ('derived_variables', lambda df: create_derived_variables(df, filename)),
+    ]
+
+def run_steps(df, steps, profiler=None):
+    """Applique les étapes dans l'ordre, jusqu'à la fin ou jusqu'à un DataFrame vide."""
+    for name, step in steps:
+        df = profiler.measure(name, step, df) if profiler else step(df)
+        if df.empty:
+            break
+    return df
+
+def process_file(filepath, filename, outlier_groups=None, profile=False, player_key=None):
     try:
         if filename.endswith('.xlsx'):
-            df = pd.read_excel(filepath)
+            read = lambda _: pd.read_excel(filepath)
         else:
-            df = pd.read_csv(filepath)
-        
-        if df.empty:
-            return df
-        
-        df = clean_column_names(df)
-        df = remove_specific_columns(df, filename)
-        df = remove_goalkeepers(df, filename)
+            read = lambda _: pd.read_csv(filepath)
+        # la lecture fait partie de la chaîne : aucune variable ne garde le DataFrame brut en vie
+        steps = [('read', read)] + cleaning_steps(filename, outlier_groups, player_key=player_key)
         
-        is_keeper = filename == 'keepers.csv'
-        df = detect_and_clean_duplicates(df, is_keeper)
-        
-        outliers_info = identify_outliers(df)
-        if outliers_info:
-            print(f"✓ {filename} - outliers cleaned")
-        
-        df = clean_outliers(df)
-        df = handle_missing_values(df)
-        df = create_derived_variables(df, filename)
+        profiler = StageProfiler() if profile else None
+        df = run_steps(None, steps, profiler)
+        if profiler:
+            profiler.report(filename)
         
         return df
         
@@ -228,40 +414,401 @@ def process_file(filepath, filename):
         print(f"✗ Error: {filename}")
         return pd.DataFrame()
 
-def main():
+# ---------- Mode streaming : gros CSV lus par blocs, en deux passes ----------
+
+def _group_key(values):
+    """Clé de groupe hachable (NaN -> None, pour que les clés manquantes se retrouvent)."""
+    return tuple(None if pd.isna(value) else value for value in values)
+
+def _row_hashes(chunk):
+    # entiers et flottants hachés pareil : 1 et 1.0 sont la même valeur d'un bloc à l'autre
+    normalized = pd.DataFrame({
+        col: chunk[col].astype('float64') if pd.api.types.is_numeric_dtype(chunk[col]) else chunk[col].astype(str)
+        for col in chunk.columns
+    })
+    return pd.util.hash_pandas_object(normalized, index=False)
+
+class SeenHashes:
+    """Empreintes de lignes déjà vues : tableaux uint64 triés, 8 octets par ligne (~70 dans un set Python).
+
+    Les tableaux sont fusionnés quand leurs tailles doublent : ajout amorti en O(log n) par empreinte,
+    au plus log2(n) tableaux à interroger.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def contains(self, hashes):
+        hashes = np.asarray(hashes, dtype='uint64')
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            positions = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[positions] == hashes
+        return found
+
+    def add(self, hashes):
+        run = np.unique(np.asarray(hashes, dtype='uint64'))
+        run = run[~self.contains(run)]
+        while self.runs and len(self.runs[-1]) <= len(run):
+            run = np.union1d(self.runs.pop(), run)
+        if len(run):
+            self.runs.append(run)
+
+    def clear(self):
+        self.runs = []
+
+class StreamStats:
+    """Statistiques d'un fichier accumulées bloc par bloc (passe 1 du mode streaming).
+
+    Tout est fusionnable : effectifs et valeurs manquantes par colonne, résumé de quantiles
+    et moments par (groupe, colonne) numérique, joueurs vus et lignes en double.
+    La détection des doublons est en mémoire O(lignes) : les joueurs vus (jusqu'au premier
+    doublon) ou, sans colonne joueur, une empreinte de 8 octets par ligne. Ces empreintes
+    peuvent entrer en collision : deux lignes différentes avec la même empreinte font retirer
+    la seconde comme doublon (probabilité ~ lignes² / 2^65, négligeable en pratique).
+    """
+
+    def __init__(self, group_cols=None, player_key=None, capacity=DEFAULT_CAPACITY):
+        self.group_cols = list(group_cols or [])
+        self.player_key = list(player_key or PLAYER_KEY)
+        self.capacity = capacity
+        self.header = None        # noms d'origine, dans l'ordre du fichier
+        self.dtypes = {}          # colonne -> types vus
+        self.rows = 0
+        self.missing = {}
+        self.sketches = {}        # (groupe, colonne) -> QuantileSketch
+        self.moments = {}         # (groupe, colonne) -> Moments
+        self.players = set()
+        self.has_duplicate_players = False
+        self.duplicate_rows = []  # numéros des lignes en double, par bloc
+        self._seen_rows = SeenHashes()
+
+    def observe(self, chunk, filename):
+        """Ajoute un bloc brut ; retourne le bloc préparé (noms, colonnes retirées, gardiens, doublons)."""
+        first = self.header is None
+        if first:
+            self.header = list(chunk.columns)
+        chunk = prepare_chunk(chunk, filename)
+        if first:
+            self.group_cols = [col for col in self.group_cols if col in chunk.columns]
+            self.player_key = player_key_columns(chunk, self.player_key)
+        for col in chunk.columns:
+            self.dtypes.setdefault(col, set()).add(chunk[col].dtype)
+
+        if self.player_key:
+            if not self.has_duplicate_players:
+                names = pd.Series([_group_key(values) for values in zip(*(chunk[col] for col in self.player_key))])
+                if names.duplicated().any() or not self.players.isdisjoint(names):
+                    self.has_duplicate_players = True
+                    self.players = set()
+                else:
+                    self.players.update(names)
+        else:
+            hashes = _row_hashes(chunk)
+            duplicated = hashes.duplicated().to_numpy() | self._seen_rows.contains(hashes.to_numpy())
+            self._seen_rows.add(hashes.to_numpy())
+            if duplicated.any():
+                self.duplicate_rows.append(chunk.index.to_numpy()[duplicated])
+            chunk = chunk[~duplicated]
+
+        self.rows += len(chunk)
+        for col, n in chunk.isnull().sum().items():
+            self.missing[col] = self.missing.get(col, 0) + int(n)
+
+        numeric = chunk.select_dtypes(include=[np.number]).columns
+        groups = chunk.groupby(self.group_cols, dropna=False) if self.group_cols else [((), chunk)]
+        for key, part in groups:
+            key = _group_key(key)
+            for col in numeric:
+                values = part[col].to_numpy(dtype='float64', na_value=np.nan)
+                self.sketches.setdefault((key, col), QuantileSketch(self.capacity)).update(values)
+                self.moments.setdefault((key, col), Moments()).update(values)
+        return chunk
+
+    def dtype_overrides(self):
+        """Types à imposer à read_csv (noms d'origine) pour que tous les blocs aient les types du fichier entier."""
+        resolved = {col: resolve_dtype(dtypes) for col, dtypes in self.dtypes.items()}
+        names = dict(zip(cleaned_column_names(self.header), self.header))
+        return {names[col]: dtype for col, dtype in resolved.items() if len(self.dtypes[col]) > 1}, resolved
+
+    def plan(self, method='iqr'):
+        """Tout ce que la passe 2 applique à chaque bloc, calculé sur le fichier entier."""
+        overrides, dtypes = self.dtype_overrides()
+        drop_col0 = dtypes.get('Col_0') == np.dtype('int64')
+        columns = [col for col in dtypes if not (col == 'Col_0' and drop_col0)]
+        numeric = [col for col in columns if dtypes[col] is not str and pd.api.types.is_numeric_dtype(dtypes[col])]
+        clip_cols = [col for col in numeric if col not in OUTLIER_EXCLUDED]
+
+        groups = list(dict.fromkeys(key for key, col in self.sketches))
+        lower = pd.DataFrame(np.nan, index=range(len(groups)), columns=clip_cols)
+        upper = lower.copy()
+        for pos, key in enumerate(groups):
+            for col in clip_cols:
+                if method == 'iqr':
+                    q1, q3 = self.sketches[key, col].quantile(0.25), self.sketches[key, col].quantile(0.75)
+                    lower.loc[pos, col], upper.loc[pos, col] = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+                else:
+                    moments = self.moments[key, col]
+                    lower.loc[pos, col] = moments.mean - 3 * moments.std()
+                    upper.loc[pos, col] = moments.mean + 3 * moments.std()
+
+        keep_int = {
+            col for col in clip_cols
+            if dtypes[col] == np.dtype('int64') and _is_integral(np.r_[lower[col], upper[col]])
+        }
+        missing_pct = pd.Series({col: self.missing[col] / self.rows * 100 for col in columns})
+        medians = {}
+        for col in numeric:
+            if 0 < missing_pct[col] <= 50:
+                merged = QuantileSketch(self.capacity)
+                for pos, key in enumerate(groups):
+                    sketch = self.sketches[key, col]
+                    if col in clip_cols:
+                        sketch = sketch.clipped(lower.loc[pos, col], upper.loc[pos, col])
+                    merged.merge(sketch)
+                medians[col] = merged.median()
+
+        # les ensembles de la passe 1 ne servent plus
+        self.players.clear()
+        self._seen_rows.clear()
+        return {
+            'overrides': overrides,
+            'dtypes': dtypes,
+            'drop_col0': drop_col0,
+            'groups': {key: pos for pos, key in enumerate(groups)},
+            'lower': lower,
+            'upper': upper,
+            'keep_int': keep_int,
+            'missing_pct': missing_pct,
+            'medians': medians,
+        }
+
+def prepare_chunk(chunk, filename, drop_col0=False):
+    """Étapes ligne à ligne du début du nettoyage (noms de colonnes, colonnes retirées, gardiens)."""
+    chunk.columns = cleaned_column_names(chunk.columns)
+    if drop_col0:
+        chunk = chunk.drop(columns=['Col_0'])
+    chunk = remove_specific_columns(chunk, filename)
+    return remove_goalkeepers(chunk, filename)
+
+def clean_chunk(chunk, filename, plan, group_cols=None):
+    """Passe 2 sur un bloc : écrêtage, valeurs manquantes et variables dérivées avec les stats du fichier entier."""
+    chunk = prepare_chunk(chunk, filename, plan['drop_col0'])
+    chunk = chunk.drop(index=plan['duplicate_rows'].intersection(chunk.index))
+
+    n_outliers = 0
+    if len(plan['lower'].columns):
+        keys = [_group_key(values) for values in zip(*(chunk[col] for col in group_cols))] if group_cols else [()] * len(chunk)
+        positions = [plan['groups'][key] for key in keys]
+        row_lower = plan['lower'].iloc[positions].set_axis(chunk.index)
+        row_upper = plan['upper'].iloc[positions].set_axis(chunk.index)
+        chunk, is_outlier = apply_bounds(chunk, row_lower, row_upper, plan['keep_int'])
+        n_outliers = int(is_outlier.to_numpy().sum())
+
+    chunk = fill_missing(chunk, plan['missing_pct'], plan['medians'])
+    return create_derived_variables(chunk, filename), n_outliers
+
+def aggregate_duplicates(filepath, filename, chunksize, plan, key):
+    """Lignes d'un même joueur agrégées bloc par bloc (une ligne par joueur en mémoire)."""
+    numeric_cols = [col for col, dtype in plan['dtypes'].items()
+                    if dtype is not str and pd.api.types.is_numeric_dtype(dtype) and not (col == 'Col_0' and plan['drop_col0'])]
+    parts, pending = [], 0
+    with pd.read_csv(filepath, chunksize=chunksize, dtype=plan['overrides']) as reader:
+        for chunk in reader:
+            chunk = prepare_chunk(chunk, filename, plan['drop_col0'])
+            parts.append(aggregate_players(chunk, key, numeric_cols))
+            pending += len(parts[-1])
+            # fusion des agrégats partiels (somme des sommes, première des premières valeurs)
+            # dès qu'ils dépassent la taille du bloc ou du dernier agrégat
+            if len(parts) > 1 and pending > max(chunksize, len(parts[0])):
+                parts = [aggregate_players(pd.concat(parts, ignore_index=True), key, numeric_cols)]
+                pending = 0
+    return aggregate_players(pd.concat(parts, ignore_index=True), key, numeric_cols)
+
+def gather_stats(filepath, filename, outlier_groups=None, chunksize=100_000, player_key=None):
+    """Passe 1 du mode streaming : statistiques de tout le fichier, bloc par bloc."""
+    stats = StreamStats(outlier_groups, player_key)
+    with pd.read_csv(filepath, chunksize=chunksize) as reader:
+        for chunk in reader:
+            stats.observe(chunk, filename)
+    return stats
+
+def stream_file(filepath, filename, outlier_groups=None, chunksize=100_000, method='iqr', profile=False,
+                player_key=None):
+    """Nettoie un CSV par blocs de chunksize lignes et écrit la sortie ; retourne le nombre de lignes écrites.
+
+    Passe 1 : statistiques fusionnables (quantiles, moments, valeurs manquantes) sur tous les blocs.
+    Passe 2 : chaque bloc est nettoyé avec ces statistiques puis ajouté à la sortie.
+    Si un joueur apparaît sur plusieurs lignes, ses lignes sont d'abord agrégées (une ligne par
+    joueur en mémoire) puis nettoyées comme dans process_file ; les sommes de flottants
+    peuvent alors différer au dernier bit près.
+    """
+    try:
+        profiler = StageProfiler() if profile else None
+        measure = profiler.measure if profiler else lambda name, func, *args: func(*args)
+        stats = measure('stats', gather_stats, filepath, filename, outlier_groups, chunksize, player_key)
+        if stats.rows == 0:
+            return 0
+
+        plan = stats.plan(method)
+        plan['duplicate_rows'] = pd.Index(np.sort(np.concatenate(stats.duplicate_rows or [np.empty(0)])), dtype='int64')
+        group_cols = stats.group_cols
+        if stats.has_duplicate_players:
+            df = measure('aggregate', aggregate_duplicates, filepath, filename, chunksize, plan, stats.player_key)
+            steps = [step for step in cleaning_steps(filename, group_cols, method, stats.player_key)
+                     if step[0] in ('outliers', 'missing_values', 'derived_variables')]
+            df = run_steps(df, steps, profiler)
+            save_cleaned(df, filename)
+            rows = len(df)
+        else:
+            rows = n_outliers = 0
+            def write(path):
+                nonlocal rows, n_outliers
+                with open(path, 'w', newline='', encoding='utf-8') as f, \
+                        pd.read_csv(filepath, chunksize=chunksize, dtype=plan['overrides']) as reader:
+                    for chunk in reader:
+                        chunk, n = clean_chunk(chunk, filename, plan, group_cols)
+                        chunk.to_csv(f, index=False, header=f.tell() == 0)
+                        rows += len(chunk)
+                        n_outliers += n
+            measure('clean', write_atomic, os.path.join(OUTPUT_DIR, filename), write)
+            # copie colonnaire par blocs aussi : le fichier nettoyé n'est jamais chargé en entier
+            if measure('columnar', write_columnar, filename, OUTPUT_DIR, chunksize):
+                print(f"✓ {filename} columnar copy saved")
+            if n_outliers:
+                print(f"✓ {filename} - {n_outliers} outliers cleaned")
+
+        if profiler:
+            profiler.report(filename)
+        return rows
+
+    except Exception as e:
+        print(f"✗ Error: {filename}")
+        return 0
+
+def copy_on_write():
+    """Copy-on-Write le temps du nettoyage : chaque étape renvoie un nouveau DataFrame sans
+    recopier les colonnes qu'elle ne modifie pas (toujours actif à partir de pandas 3)."""
+    if int(pd.__version__.split('.')[0]) < 3:
+        return pd.option_context('mode.copy_on_write', True)
+    return nullcontext()
+
+def clean_file(filename, outlier_groups=None, chunksize=None, profile=False, player_key=None):
+    """Nettoie et sauvegarde un fichier de datas/ ; retourne son statut et sa durée.
+
+    Avec chunksize, les CSV sont lus et nettoyés par blocs (stream_file).
+    """
+    start = time.perf_counter()
+    with copy_on_write():
+        if chunksize and filename.endswith('.csv'):
+            rows = stream_file(os.path.join(INPUT_DIR, filename), filename, outlier_groups, chunksize,
+                               profile=profile, player_key=player_key)
+        else:
+            cleaned_df = process_file(os.path.join(INPUT_DIR, filename), filename, outlier_groups, profile,
+                                      player_key)
+            rows = len(cleaned_df)
+            if rows:
+                save_cleaned(cleaned_df, filename)
+    return {'file': filename, 'ok': rows > 0, 'rows': rows, 'seconds': time.perf_counter() - start}
+
+def run_cleaning(filenames, workers=1, outlier_groups=None, chunksize=None, profile=False, player_key=None):
+    """clean_file sur chaque fichier, en parallèle si workers > 1 (résultats dans l'ordre de filenames)."""
+    clean = partial(clean_file, outlier_groups=outlier_groups, chunksize=chunksize, profile=profile,
+                    player_key=player_key)
+    if workers <= 1 or len(filenames) < 2:
+        return [clean(filename) for filename in filenames]
+    # les plus gros fichiers d'abord, pour ne pas finir sur un long fichier isolé
+    by_size = sorted(filenames, key=lambda f: os.path.getsize(os.path.join(INPUT_DIR, f)), reverse=True)
+    with ProcessPoolExecutor(max_workers=min(workers, len(filenames))) as pool:
+        results = dict(zip(by_size, pool.map(clean, by_size)))
+    return [results[filename] for filename in filenames]
+
+def main(incremental=True, workers=1, outlier_groups=None, chunksize=None, profile=False, player_key=None):
     try:
         create_cleaned_directory()
+        manifest = load_manifest() if incremental else {}
         
-        data_files = [f for f in os.listdir('datas') if f.endswith(('.csv', '.xlsx'))]
+        data_files = sorted(f for f in os.listdir(INPUT_DIR) if f.endswith(('.csv', '.xlsx')))
+        changed = False
         
+        to_process = {}
         for filename in data_files:
-            filepath = os.path.join('datas', filename)
-            
-            if not os.path.exists(filepath):
-                print(f"File {filename} not found, skipping...")
-                continue
-            
-            print(f"Processing {filename}...")
-            
-            cleaned_df = process_file(filepath, filename)
-            
-            if not cleaned_df.empty:
-                output_path = os.path.join('datas_cleaned', filename)
-                
-                if filename.endswith('.xlsx'):
-                    cleaned_df.to_excel(output_path, index=False)
-                else:
-                    cleaned_df.to_csv(output_path, index=False)
-                
-                print(f"✓ {filename} cleaned and saved")
+            digest = file_hash(os.path.join(INPUT_DIR, filename))
+            if is_up_to_date(manifest.get(filename), digest, outlier_groups, player_key):
+                print(f"= {filename} unchanged, skipping")
+            else:
+                to_process[filename] = digest
+        
+        if to_process:
+            print(f"Processing {len(to_process)} file(s) with {max(workers, 1)} worker(s)...")
+        start = time.perf_counter()
+        results = run_cleaning(list(to_process), workers, outlier_groups, chunksize, profile, player_key)
+        
+        for result in results:
+            filename = result['file']
+            if result['ok']:
+                manifest[filename] = {
+                    'sha256': to_process[filename],
+                    'pipeline_version': PIPELINE_VERSION,
+                    'outlier_groups': outlier_groups or None,
+                    'player_key': player_key or None,
+                    'output': filename,
+                    'cleaned_at': datetime.now().isoformat(timespec='seconds')
+                }
+                changed = True
+                print(f"✓ {filename} cleaned and saved ({result['rows']} rows, {result['seconds']:.2f}s)")
             else:
-                print(f"✗ {filename} could not be processed")
+                print(f"✗ {filename} could not be processed ({result['seconds']:.2f}s)")
+        if results:
+            print(f"Cleaning time: {time.perf_counter() - start:.2f}s")
+        
+        # entrées supprimées de datas/ : leurs sorties aussi
+        for filename in sorted(set(manifest) - set(data_files)):
+            for path in (os.path.join(OUTPUT_DIR, manifest[filename]['output']),
+                         os.path.join(OUTPUT_DIR, os.path.splitext(manifest[filename]['output'])[0] + '.parquet')):
+                if os.path.exists(path):
+                    os.remove(path)
+            del manifest[filename]
+            changed = True
+            print(f"✓ {filename} removed from cleaned data")
+        
+        save_manifest(manifest)
+        
+        derived_missing = not all(os.path.exists(os.path.join(OUTPUT_DIR, f)) for f in (CROSSWALK_FILE, PROFILES_FILE))
+        if changed or derived_missing:
+            try:
+                crosswalk = write_crosswalk(OUTPUT_DIR)
+                print(f"✓ {CROSSWALK_FILE} built ({crosswalk['player_id'].nunique()} players)")
+                write_player_profiles(OUTPUT_DIR, crosswalk=crosswalk)
+                print(f"✓ {PROFILES_FILE} built")
+            except Exception as e:
+                print(f"✗ {PROFILES_FILE} could not be built: {e}")
+        else:
+            print(f"= {CROSSWALK_FILE} and {PROFILES_FILE} up to date")
         
         print("\nData cleaning completed successfully!")
-        print("Cleaned files saved in 'datas_cleaned' directory")
+        print(f"Cleaned files saved in '{OUTPUT_DIR}' directory")
         
     except Exception as e:
         print(f"Error in main process: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Clean the raw FBref exports of datas/ into datas_cleaned/.")
+    parser.add_argument('--full', action='store_true',
+                        help="reprocess every input, even those unchanged since the last run")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of processes used to clean the files in parallel")
+    parser.add_argument('--outlier-groups', nargs='+', metavar='COLUMN',
+                        help="clip outliers within each group of these columns (e.g. Pos Comp) instead of the whole file")
+    parser.add_argument('--chunksize', type=int, metavar='ROWS',
+                        help="stream CSV inputs in blocks of ROWS rows (two passes, bounded memory) for very large exports")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="print the duration and peak memory (tracemalloc) of each cleaning stage")
+    parser.add_argument('--player-key', nargs='+', metavar='COLUMN',
+                        help="columns identifying a player when merging duplicate rows (default: Player; e.g. Player Born)")
+    args = parser.parse_args()
+    main(incremental=not args.full, workers=args.workers, outlier_groups=args.outlier_groups,
+         chunksize=args.chunksize, profile=args.profile_memory, player_key=args.player_key)
@@ -11,7 +11,7 @@ import re
 import time
 from urllib.parse import urljoin, urlparse
 
-import requests
+import http_cache
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
@@ -51,11 +51,10 @@ def ext_from_content_type(ct: str) -> str:
 
 def download_image(url: str, outpath: str) -> bool:
     try:
-        r = requests.get(url, headers=HEADERS, stream=True, timeout=20)
+        r = http_cache.get(url, headers=HEADERS, timeout=20)
         r.raise_for_status()
         with open(outpath, "wb") as f:
-            for chunk in r.iter_content(8192):
-                f.write(chunk)
+            f.write(r.content)
         return True
     except Exception as e:
         print(f"  ! Erreur téléchargement {url}: {e}")
@@ -212,9 +211,9 @@ def main():
         parsed = urlparse(src)
         ext = os.path.splitext(parsed.path)[1]
         if not ext or len(ext) > 5:
-            # HEAD request rapide
+            # GET mis en cache : le téléchargement qui suit est servi depuis le disque
             try:
-                h = requests.head(src, headers=HEADERS, timeout=10, allow_redirects=True)
+                h = http_cache.get(src, headers=HEADERS, timeout=10)
                 ext = ext_from_content_type(h.headers.get("Content-Type", ""))
             except Exception:
                 ext = ".png"
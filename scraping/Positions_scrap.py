@@ -1,266 +1,162 @@
+import argparse
 import os
-import time
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
 # --- Config ---
-URL = "https://www.footmercato.net/angleterre/premier-league/2023-2024/joueur"
+BASE_URL = "https://www.footmercato.net"
+SEASON = "2023-2024"
 OUTDIR = "datas"
-os.makedirs(OUTDIR, exist_ok=True)
-CSV_PATH = os.path.join(OUTDIR, "premier_league_players_positions.csv")
-
-# --- Selenium Setup ---
-options = Options()
-options.add_argument("--headless=new")
-options.add_argument("--window-size=1366,1080")
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-driver.get(URL)
-time.sleep(5)
-
-players_data = []
 
-while True:
-    # --- Récupérer les joueurs visibles ---
-    players = driver.find_elements(By.CSS_SELECTOR, "span.personCardCell__infos")
-    for p in players:
-        try:
-            name = p.find_element(By.CSS_SELECTOR, "span.personCardCell__name").text.strip()
-            position = p.find_element(By.CSS_SELECTOR, "span.personCardCell__description").text.strip()
-            if {"Name": name, "Position": position} not in players_data:
-                players_data.append({"Name": name, "Position": position})
-        except:
-            continue
-
-    # --- Chercher le bouton "Afficher plus" par texte ---
+# Ligue -> (chemin de la page footmercato, fichier CSV de sortie)
+LEAGUES = {
+    "premier_league": ("angleterre/premier-league", "premier_league_players_positions.csv"),
+    "bundesliga": ("allemagne/bundesliga", "bundesliga_players_positions.csv"),
+    "ligue_1": ("france/ligue-1", "ligue_1_players_positions.csv"),
+    "serie_a": ("italie/serie-a", "serie_a_players_positions.csv"),
+    "liga": ("espagne/liga", "liga_players_positions.csv"),
+}
+
+CARD_SELECTOR = "span.personCardCell__infos"
+LOAD_MORE_XPATH = "//a[contains(., 'Afficher plus')]"
+
+# Nom et poste des cartes à partir de l'index arguments[1], en un seul aller-retour WebDriver.
+# Renvoie aussi le nombre de cartes, point de départ de l'appel suivant (liste re-rendue : on repart de 0).
+CARDS_SCRIPT = """
+const cards = document.querySelectorAll(arguments[0]);
+const start = arguments[1] <= cards.length ? arguments[1] : 0;
+const rows = [];
+for (let i = start; i < cards.length; i++) {
+    const name = cards[i].querySelector('span.personCardCell__name');
+    const position = cards[i].querySelector('span.personCardCell__description');
+    if (name && position) {
+        rows.push([name.innerText.trim(), position.innerText.trim()]);
+    }
+}
+return [cards.length, rows];
+"""
+
+# Attentes (secondes) : premières cartes, bouton "Afficher plus", nouvelles cartes après un clic
+PAGE_TIMEOUT = 20
+BUTTON_TIMEOUT = 5
+LOAD_TIMEOUT = 15
+POLL = 0.2
+
+def league_url(path, season=SEASON):
+    return f"{BASE_URL}/{path}/{season}/joueur"
+
+def make_driver(driver_path):
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1366,1080")
+    return webdriver.Chrome(service=Service(driver_path), options=options)
+
+def card_count(driver):
+    return driver.execute_script("return document.querySelectorAll(arguments[0]).length;", CARD_SELECTOR)
+
+def load_more(driver):
+    """Clique sur "Afficher plus" et attend les nouvelles cartes. False quand tout est chargé."""
     try:
-        load_more = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.XPATH, "//a[contains(., 'Afficher plus')]"))
+        button = WebDriverWait(driver, BUTTON_TIMEOUT, poll_frequency=POLL).until(
+            EC.element_to_be_clickable((By.XPATH, LOAD_MORE_XPATH))
         )
-        driver.execute_script("arguments[0].scrollIntoView();", load_more)
-        time.sleep(1)
-        load_more.click()
-        time.sleep(2)  # attendre le chargement
     except TimeoutException:
-        break  # plus de bouton → tous les joueurs sont chargés
-
-driver.quit()
-
-# --- Sauvegarder CSV ---
-df = pd.DataFrame(players_data)
-df.to_csv(CSV_PATH, index=False)
-print(f"✅ Extraction terminée. {len(players_data)} joueurs enregistrés dans '{CSV_PATH}'")
-
-
-
-
-
-
-
-# --- Config ---
-URL = "https://www.footmercato.net/allemagne/bundesliga/2023-2024/joueur"
-OUTDIR = "datas"
-os.makedirs(OUTDIR, exist_ok=True)
-CSV_PATH = os.path.join(OUTDIR, "bundesliga_players_positions.csv")
-
-# --- Selenium Setup ---
-options = Options()
-options.add_argument("--headless=new")
-options.add_argument("--window-size=1366,1080")
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-driver.get(URL)
-time.sleep(5)
+        return False  # plus de bouton → tous les joueurs sont chargés
 
-players_data = []
-
-while True:
-    # --- Récupérer les joueurs visibles ---
-    players = driver.find_elements(By.CSS_SELECTOR, "span.personCardCell__infos")
-    for p in players:
-        try:
-            name = p.find_element(By.CSS_SELECTOR, "span.personCardCell__name").text.strip()
-            position = p.find_element(By.CSS_SELECTOR, "span.personCardCell__description").text.strip()
-            if {"Name": name, "Position": position} not in players_data:
-                players_data.append({"Name": name, "Position": position})
-        except:
-            continue
-
-    # --- Chercher le bouton "Afficher plus" par texte ---
+    before = card_count(driver)
+    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
     try:
-        load_more = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.XPATH, "//a[contains(., 'Afficher plus')]"))
-        )
-        driver.execute_script("arguments[0].scrollIntoView();", load_more)
-        time.sleep(1)
-        load_more.click()
-        time.sleep(2)  # attendre le chargement
-    except TimeoutException:
-        break  # plus de bouton → tous les joueurs sont chargés
-
-driver.quit()
-
-# --- Sauvegarder CSV ---
-df = pd.DataFrame(players_data)
-df.to_csv(CSV_PATH, index=False)
-print(f"✅ Extraction terminée. {len(players_data)} joueurs enregistrés dans '{CSV_PATH}'")
-
-
-
-
-
-
-# --- Config ---
-URL = "https://www.footmercato.net/france/ligue-1/2023-2024/joueur"
-OUTDIR = "datas"
-os.makedirs(OUTDIR, exist_ok=True)
-CSV_PATH = os.path.join(OUTDIR, "ligue_1_players_positions.csv")
-
-# --- Selenium Setup ---
-options = Options()
-options.add_argument("--headless=new")
-options.add_argument("--window-size=1366,1080")
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-driver.get(URL)
-time.sleep(5)
-
-players_data = []
-
-while True:
-    # --- Récupérer les joueurs visibles ---
-    players = driver.find_elements(By.CSS_SELECTOR, "span.personCardCell__infos")
-    for p in players:
-        try:
-            name = p.find_element(By.CSS_SELECTOR, "span.personCardCell__name").text.strip()
-            position = p.find_element(By.CSS_SELECTOR, "span.personCardCell__description").text.strip()
-            if {"Name": name, "Position": position} not in players_data:
-                players_data.append({"Name": name, "Position": position})
-        except:
-            continue
-
-    # --- Chercher le bouton "Afficher plus" par texte ---
+        button.click()
+    except ElementClickInterceptedException:
+        # bandeau (cookies, pub) au-dessus du bouton
+        driver.execute_script("arguments[0].click();", button)
     try:
-        load_more = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.XPATH, "//a[contains(., 'Afficher plus')]"))
-        )
-        driver.execute_script("arguments[0].scrollIntoView();", load_more)
-        time.sleep(1)
-        load_more.click()
-        time.sleep(2)  # attendre le chargement
+        WebDriverWait(driver, LOAD_TIMEOUT, poll_frequency=POLL).until(lambda d: card_count(d) > before)
     except TimeoutException:
-        break  # plus de bouton → tous les joueurs sont chargés
-
-driver.quit()
-
-# --- Sauvegarder CSV ---
-df = pd.DataFrame(players_data)
-df.to_csv(CSV_PATH, index=False)
-print(f"✅ Extraction terminée. {len(players_data)} joueurs enregistrés dans '{CSV_PATH}'")
-
-
-
-
-
-# --- Config ---
-URL = "https://www.footmercato.net/italie/serie-a/2023-2024/joueur"
-OUTDIR = "datas"
-os.makedirs(OUTDIR, exist_ok=True)
-CSV_PATH = os.path.join(OUTDIR, "serie_a_players_positions.csv")
-
-# --- Selenium Setup ---
-options = Options()
-options.add_argument("--headless=new")
-options.add_argument("--window-size=1366,1080")
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-driver.get(URL)
-time.sleep(5)
-
-players_data = []
-
-while True:
-    # --- Récupérer les joueurs visibles ---
-    players = driver.find_elements(By.CSS_SELECTOR, "span.personCardCell__infos")
-    for p in players:
-        try:
-            name = p.find_element(By.CSS_SELECTOR, "span.personCardCell__name").text.strip()
-            position = p.find_element(By.CSS_SELECTOR, "span.personCardCell__description").text.strip()
-            if {"Name": name, "Position": position} not in players_data:
+        return False  # clic sans nouvelles cartes
+    return True
+
+def scrape_league(driver, url):
+    """Joueurs (Name, Position) d'une page de ligue, en dépliant toute la liste."""
+    driver.get(url)
+    WebDriverWait(driver, PAGE_TIMEOUT, poll_frequency=POLL).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, CARD_SELECTOR))
+    )
+
+    players_data = []
+    seen = set()
+    start = 0
+    while True:
+        # --- Récupérer les joueurs ajoutés depuis le dernier clic ---
+        start, rows = driver.execute_script(CARDS_SCRIPT, CARD_SELECTOR, start)
+        for name, position in rows:
+            if (name, position) not in seen:
+                seen.add((name, position))
                 players_data.append({"Name": name, "Position": position})
-        except:
-            continue
-
-    # --- Chercher le bouton "Afficher plus" par texte ---
-    try:
-        load_more = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.XPATH, "//a[contains(., 'Afficher plus')]"))
-        )
-        driver.execute_script("arguments[0].scrollIntoView();", load_more)
-        time.sleep(1)
-        load_more.click()
-        time.sleep(2)  # attendre le chargement
-    except TimeoutException:
-        break  # plus de bouton → tous les joueurs sont chargés
-
-driver.quit()
-
-# --- Sauvegarder CSV ---
-df = pd.DataFrame(players_data)
-df.to_csv(CSV_PATH, index=False)
-print(f"✅ Extraction terminée. {len(players_data)} joueurs enregistrés dans '{CSV_PATH}'")
-
-
-
 
+        if not load_more(driver):
+            break
 
+    return players_data
 
-# --- Config ---
-URL = "https://www.footmercato.net/espagne/liga/2023-2024/joueur"
-OUTDIR = "datas"
-os.makedirs(OUTDIR, exist_ok=True)
-CSV_PATH = os.path.join(OUTDIR, "liga_players_positions.csv")
-
-# --- Selenium Setup ---
-options = Options()
-options.add_argument("--headless=new")
-options.add_argument("--window-size=1366,1080")
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-driver.get(URL)
-time.sleep(5)
+def scrape_positions(leagues=None, workers=3, outdir=OUTDIR, season=SEASON):
+    """Scrape les ligues demandées avec au plus workers navigateurs, réutilisés d'une ligue à l'autre."""
+    leagues = list(leagues or LEAGUES)
+    workers = max(1, min(workers, len(leagues)))
+    os.makedirs(outdir, exist_ok=True)
+    # un seul téléchargement du driver, partagé par tous les navigateurs
+    driver_path = ChromeDriverManager().install()
 
-players_data = []
+    idle = queue.Queue()
+    drivers = []
 
-while True:
-    # --- Récupérer les joueurs visibles ---
-    players = driver.find_elements(By.CSS_SELECTOR, "span.personCardCell__infos")
-    for p in players:
+    def run(league):
         try:
-            name = p.find_element(By.CSS_SELECTOR, "span.personCardCell__name").text.strip()
-            position = p.find_element(By.CSS_SELECTOR, "span.personCardCell__description").text.strip()
-            if {"Name": name, "Position": position} not in players_data:
-                players_data.append({"Name": name, "Position": position})
-        except:
-            continue
+            driver = idle.get_nowait()
+        except queue.Empty:
+            driver = make_driver(driver_path)
+            drivers.append(driver)
+        try:
+            path, _ = LEAGUES[league]
+            return scrape_league(driver, league_url(path, season))
+        finally:
+            idle.put(driver)
 
-    # --- Chercher le bouton "Afficher plus" par texte ---
+    saved = {}
     try:
-        load_more = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.XPATH, "//a[contains(., 'Afficher plus')]"))
-        )
-        driver.execute_script("arguments[0].scrollIntoView();", load_more)
-        time.sleep(1)
-        load_more.click()
-        time.sleep(2)  # attendre le chargement
-    except TimeoutException:
-        break  # plus de bouton → tous les joueurs sont chargés
-
-driver.quit()
-
-# --- Sauvegarder CSV ---
-df = pd.DataFrame(players_data)
-df.to_csv(CSV_PATH, index=False)
-print(f"✅ Extraction terminée. {len(players_data)} joueurs enregistrés dans '{CSV_PATH}'")
\ No newline at end of file
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run, league): league for league in leagues}
+            for future in as_completed(futures):
+                league = futures[future]
+                csv_path = os.path.join(outdir, LEAGUES[league][1])
+                try:
+                    players_data = future.result()
+                except Exception as e:
+                    print(f"✗ {league} - {e}")
+                    continue
+                # --- Sauvegarder CSV ---
+                pd.DataFrame(players_data, columns=["Name", "Position"]).to_csv(csv_path, index=False)
+                saved[league] = csv_path
+                print(f"✅ Extraction terminée. {len(players_data)} joueurs enregistrés dans '{csv_path}'")
+    finally:
+        for driver in drivers:
+            driver.quit()
+    return saved
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Postes détaillés des joueurs (footmercato)")
+    parser.add_argument("--leagues", nargs="+", choices=list(LEAGUES), help="ligues à scraper (toutes par défaut)")
+    parser.add_argument("--workers", type=int, default=3, help="navigateurs ouverts en parallèle")
+    parser.add_argument("--season", default=SEASON)
+    args = parser.parse_args()
+    scrape_positions(args.leagues, args.workers, season=args.season)
@@ -1,86 +1,354 @@
+import argparse
+import asyncio
+import contextlib
+import random
+import re
+import time
+import timeit
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 import pandas as pd
+from pandas.io.parsers import TextParser
 
-def fetch_fbref_keeper_stats(season="2023-2024"):
-    url = f"https://fbref.com/en/comps/Big5/{season}/keepers/players/{season}-Big-5-European-Leagues-Stats"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                      "AppleWebKit/537.36 (KHTML, like Gecko) "
-                      "Chrome/120.0.0.0 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Referer": "https://google.com"
-    }
-
-    resp = requests.get(url, headers=headers)
-    if resp.status_code != 200:
-        raise Exception(f"Erreur HTTP {resp.status_code} pour l’URL {url}")
-
-    soup = BeautifulSoup(resp.text, "lxml")
-
-    # Récupérer directement le tableau avec id="stats_keeper"
-    table = soup.find("table", {"id": "stats_keeper"})
-    if table is None:
-        raise Exception("Impossible de trouver le tableau des gardiens (id=stats_keeper).")
+from http_cache import default_cache
 
-    # Conversion en DataFrame
-    df = pd.read_html(str(table))[0]
+FBREF_BASE_URL = "https://fbref.com"
 
-    return df
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://google.com"
+}
 
-def fetch_fbref_defensive_stats(season="2023-2024"):
-    url = f"https://fbref.com/en/comps/Big5/{season}/defense/players/{season}-Big-5-European-Leagues-Stats"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                      "AppleWebKit/537.36 (KHTML, like Gecko) "
-                      "Chrome/120.0.0.0 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Referer": "https://google.com"
-    }
-
-    resp = requests.get(url, headers=headers)
-    if resp.status_code != 200:
-        raise Exception(f"Erreur HTTP {resp.status_code} pour l’URL {url}")
-
-    soup = BeautifulSoup(resp.text, "lxml")
-
-    # Récupération directe du tableau
-    table = soup.find("table", {"id": "stats_defense"})
-    if table is None:
-        raise Exception("Impossible de trouver le tableau des stats défensives (id=stats_defense).")
+# Type de stats -> (segment d'URL FBref, id du tableau dans la page)
+STAT_TABLES = {
+    "standard": ("stats", "stats_standard"),
+    "shooting": ("shooting", "stats_shooting"),
+    "passing": ("passing", "stats_passing"),
+    "passing_types": ("passing_types", "stats_passing_types"),
+    "gca": ("gca", "stats_gca"),
+    "defense": ("defense", "stats_defense"),
+    "possession": ("possession", "stats_possession"),
+    "playingtime": ("playingtime", "stats_playing_time"),
+    "misc": ("misc", "stats_misc"),
+    "keepers": ("keepers", "stats_keeper"),
+    "keepersadv": ("keepersadv", "stats_keeper_adv"),
+}
 
-    df = pd.read_html(str(table))[0]
-    return df
+# Politesse envers FBref (une dizaine de requêtes par minute tolérées) :
+# requêtes simultanées par hôte, délai minimal entre deux départs, nouvelles tentatives
+MAX_PER_HOST = 3
+MIN_INTERVAL = 6.0
+MAX_RETRIES = 4
+BACKOFF = 5.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
 
-def flatten_multiindex_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Aplati les colonnes si elles sont en MultiIndex."""
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = ["_".join([c for c in col if c and c != ""]) for col in df.columns]
+def fbref_url(stat_type, season="2023-2024", base_url=FBREF_BASE_URL):
+    """URL de la page FBref (5 grands championnats) d'un type de stats pour une saison."""
+    segment = STAT_TABLES[stat_type][0]
+    return f"{base_url}/en/comps/Big5/{season}/{segment}/players/{season}-Big-5-European-Leagues-Stats"
+
+def make_session(pool_size=MAX_PER_HOST):
+    """Session partagée : entêtes communs et connexions réutilisées (keep-alive)."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class HostLimiter:
+    """Par hôte : au plus max_concurrent requêtes en cours, départs espacés d'au moins min_interval secondes."""
+
+    def __init__(self, max_concurrent=MAX_PER_HOST, min_interval=MIN_INTERVAL):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self._slots = {}
+        self._locks = {}
+        self._next_start = {}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url):
+        host = urlsplit(url).netloc
+        semaphore = self._slots.setdefault(host, asyncio.Semaphore(self.max_concurrent))
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with semaphore:
+            async with lock:
+                wait = self._next_start.get(host, 0.0) - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start[host] = time.monotonic() + self.min_interval
+            yield
+
+    def pause(self, url, seconds):
+        """Repousse toutes les prochaines requêtes vers l'hôte (réponse 429, serveur saturé)."""
+        host = urlsplit(url).netloc
+        self._next_start[host] = max(self._next_start.get(host, 0.0), time.monotonic() + seconds)
+
+def _retry_after(resp):
+    # Retry-After : un nombre de secondes ou une date HTTP
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+async def fetch_html(session, url, limiter, retries=MAX_RETRIES, backoff=BACKOFF, timeout=60, cache=None):
+    """Télécharge une page ; réessaie (attente exponentielle) sur 429, 5xx et erreurs réseau.
+
+    Avec cache (HttpCache), une entrée récente est servie sans attendre le limiteur.
+    """
+    if cache is not None:
+        cached = cache.fresh(url)
+        if cached is not None:
+            return cached.text
+
+    for attempt in range(retries + 1):
+        error = None
+        async with limiter.slot(url):
+            try:
+                # requests est bloquant : l'appel tourne dans un thread, la boucle reste libre
+                if cache is not None:
+                    resp = await asyncio.to_thread(cache.get, url, session=session, timeout=timeout)
+                else:
+                    resp = await asyncio.to_thread(session.get, url, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                resp, error = None, e
+
+        if resp is not None and resp.status_code == 200:
+            return resp.text
+        if resp is not None and resp.status_code not in RETRY_STATUS:
+            raise Exception(f"Erreur HTTP {resp.status_code} pour l’URL {url}")
+        if attempt == retries:
+            if error is not None:
+                raise error
+            raise Exception(f"Erreur HTTP {resp.status_code} pour l’URL {url}")
+
+        delay = backoff * 2 ** attempt * (1 + random.random() / 2)
+        if resp is not None:
+            delay = max(delay, _retry_after(resp) or 0.0)
+            if resp.status_code == 429:
+                limiter.pause(url, delay)
+        await asyncio.sleep(delay)
+
+# Nettoyage du texte des cellules, comme pd.read_html
+_RE_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+_RE_TABLE_END = re.compile(r"</table\s*>", re.I)
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+class _TableRows(HTMLParser):
+    """Lignes d'un fragment <table>...</table> : (section, classes, textes, que des <th>)."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._section = "tbody"
+        self._row = None
+        self._cell = None
+        self._hidden = []   # balises style="display:none" ouvertes (ignorées, comme read_html)
+        self._caption = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag not in _VOID_TAGS and "display:none" in (attrs.get("style") or "").replace(" ", ""):
+            self._hidden.append(tag)
+        if tag in ("thead", "tbody", "tfoot"):
+            self._end_row()
+            self._section = tag
+        elif tag == "caption":
+            self._caption += 1
+        elif tag == "tr":
+            self._end_row()
+            self._row = ([], attrs.get("class") or "", [])
+        elif tag in ("th", "td"):
+            if self._row is None:
+                self._row = ([], "", [])
+            self._end_cell()
+            span = attrs.get("colspan") or "1"
+            self._cell = ([], int(span) if span.isdigit() else 1, tag == "th")
+
+    def handle_endtag(self, tag):
+        if self._hidden and self._hidden[-1] == tag:
+            self._hidden.pop()
+        if tag in ("th", "td"):
+            self._end_cell()
+        elif tag == "tr":
+            self._end_row()
+        elif tag == "caption":
+            self._caption -= 1
+
+    def handle_data(self, data):
+        if self._cell is not None and not self._hidden and not self._caption:
+            self._cell[0].append(data)
+
+    def _end_cell(self):
+        if self._cell is not None:
+            parts, span, is_th = self._cell
+            text = _RE_WHITESPACE.sub(" ", "".join(parts).strip())
+            self._row[0].extend([text] * span)
+            self._row[2].append(is_th)
+            self._cell = None
+
+    def _end_row(self):
+        self._end_cell()
+        if self._row is not None:
+            texts, css, kinds = self._row
+            if texts:
+                self.rows.append((self._section, css, texts, all(kinds)))
+            self._row = None
+
+def _table_rows(fragment):
+    """Lignes du fragment <table> (lxml si disponible, sinon html.parser de la bibliothèque standard)."""
+    try:
+        from lxml import html as lxml_html
+    except ImportError:
+        parser = _TableRows()
+        parser.feed(fragment)
+        parser.close()
+        parser._end_row()
+        return parser.rows
+
+    table = lxml_html.fragment_fromstring(fragment)
+    for hidden in table.xpath('.//*[contains(translate(@style, " ", ""), "display:none")]'):
+        hidden.drop_tree()
+    for caption in table.iter("caption"):
+        caption.drop_tree()
+    rows = []
+    for tr in table.iter("tr"):
+        parent = tr.getparent().tag
+        section = parent if parent in ("thead", "tbody", "tfoot") else "tbody"
+        texts, kinds = [], []
+        for cell in tr:
+            if cell.tag not in ("th", "td"):
+                continue
+            span = cell.get("colspan") or "1"
+            text = _RE_WHITESPACE.sub(" ", cell.text_content().strip())
+            texts.extend([text] * (int(span) if span.isdigit() else 1))
+            kinds.append(cell.tag == "th")
+        if texts:
+            rows.append((section, tr.get("class") or "", texts, all(kinds)))
+    return rows
+
+def _flat_names(columns):
+    # ("Tackles", "Tkl") -> "Tackles_Tkl", ("Unnamed: 1_level_0", "Player") -> "Player"
+    names, seen = [], {}
+    for col in columns:
+        parts = col if isinstance(col, tuple) else (col,)
+        name = "_".join(str(p) for p in parts if p and not str(p).startswith("Unnamed:")) or str(parts[-1])
+        # doublons suffixés .1, .2... comme read_csv
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        names.append(f"{name}.{count}" if count else name)
+    return names
+
+def extract_table(html, table_id, flatten=False):
+    """DataFrame du tableau table_id d'une page HTML, en une seule lecture.
+
+    Le tableau est repéré directement dans le texte de la page, y compris dans les
+    commentaires HTML où FBref cache une partie de ses tableaux, et seul ce fragment
+    est analysé (lxml, ou html.parser s'il n'est pas installé). Même résultat que pd.read_html sur le tableau (entêtes sur plusieurs
+    lignes en MultiIndex, colspan recopié, nombres typés, séparateur de milliers ",") ;
+    flatten=True aplatit les entêtes ("Tackles_Tkl", "Player").
+    """
+    pattern = r"<table\b[^>]*\bid\s*=\s*[\"']?" + re.escape(table_id) + r"[\"'\s>]"
+    match = re.search(pattern, html, re.I)
+    if match is None:
+        raise Exception(f"Impossible de trouver le tableau (id={table_id}).")
+    end = _RE_TABLE_END.search(html, match.end())
+    table_rows = _table_rows(html[match.start():end.end() if end else len(html)])
+
+    head = [texts for section, _, texts, _ in table_rows if section == "thead"]
+    body = [(texts, only_th) for section, _, texts, only_th in table_rows if section == "tbody"]
+    foot = [texts for section, _, texts, _ in table_rows if section == "tfoot"]
+    if not head:
+        # sans <thead>, les premières lignes faites uniquement de <th> servent d'entête
+        while body and body[0][1]:
+            head.append(body.pop(0)[0])
+    body = [texts for texts, _ in body]
+
+    rows = head + body + foot
+    width = max((len(row) for row in rows), default=0)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    if len(head) == 1:
+        header = 0
+    elif head:
+        header = [i for i, row in enumerate(head) if any(row)]
+    else:
+        header = None
+
+    with TextParser(rows, header=header, thousands=",") as reader:
+        df = reader.read()
+    if flatten:
+        df.columns = _flat_names(df.columns)
     return df
 
-def fetch_fbref_passing_stats(season="2023-2024"):
-    url = f"https://fbref.com/en/comps/Big5/{season}/passing/players/{season}-Big-5-European-Leagues-Stats"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                      "AppleWebKit/537.36 (KHTML, like Gecko) "
-                      "Chrome/120.0.0.0 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Referer": "https://google.com"
-    }
-
-    resp = requests.get(url, headers=headers)
-    if resp.status_code != 200:
-        raise Exception(f"Erreur HTTP {resp.status_code} pour l’URL {url}")
-
-    soup = BeautifulSoup(resp.text, "lxml")
-
-    # Récupération du tableau des passes
-    table = soup.find("table", {"id": "stats_passing"})
+def parse_stats_table(html, table_id, flatten=False):
+    """DataFrame du tableau table_id d'une page FBref."""
+    return extract_table(html, table_id, flatten)
+
+def parse_stats_table_bs4(html, table_id):
+    """Ancienne lecture (BeautifulSoup + read_html), gardée pour le benchmark."""
+    from bs4 import BeautifulSoup
+    from io import StringIO
+    soup = BeautifulSoup(html, "lxml")
+    table = soup.find("table", {"id": table_id})
     if table is None:
-        raise Exception("Impossible de trouver le tableau des stats de passes (id=stats_passing).")
+        raise Exception(f"Impossible de trouver le tableau (id={table_id}).")
+    return pd.read_html(StringIO(str(table)))[0]
 
-    df = pd.read_html(str(table))[0]
-    return df
+async def fetch_tables_async(tables, base_url=FBREF_BASE_URL, max_per_host=MAX_PER_HOST,
+                             min_interval=MIN_INTERVAL, retries=MAX_RETRIES, backoff=BACKOFF, session=None, cache=None,
+                             flatten=False):
+    """Télécharge en parallèle les tableaux [(type de stats, saison), ...] -> {(type, saison): DataFrame}.
+
+    Les pages passent par le cache disque partagé des scrapers (http_cache.default_cache() par défaut).
+    """
+    tables = list(dict.fromkeys(tables))
+    limiter = HostLimiter(max_per_host, min_interval)
+    if cache is None:
+        cache = default_cache()
+    own_session = session is None
+    if own_session:
+        session = make_session(max_per_host)
+
+    async def fetch_one(stat_type, season):
+        url = fbref_url(stat_type, season, base_url)
+        html = await fetch_html(session, url, limiter, retries, backoff, cache=cache)
+        return await asyncio.to_thread(parse_stats_table, html, STAT_TABLES[stat_type][1], flatten)
+
+    try:
+        frames = await asyncio.gather(*(fetch_one(stat_type, season) for stat_type, season in tables))
+    finally:
+        if own_session:
+            session.close()
+    return dict(zip(tables, frames))
+
+def fetch_fbref_tables(tables, **kwargs):
+    """Version synchrone de fetch_tables_async (scripts, notebooks sans boucle asyncio)."""
+    return asyncio.run(fetch_tables_async(tables, **kwargs))
+
+def fetch_fbref_table(stat_type, season="2023-2024", **kwargs):
+    return fetch_fbref_tables([(stat_type, season)], **kwargs)[(stat_type, season)]
+
+def fetch_fbref_keeper_stats(season="2023-2024"):
+    return fetch_fbref_table("keepers", season)
+
+def fetch_fbref_defensive_stats(season="2023-2024"):
+    return fetch_fbref_table("defense", season)
+
+def fetch_fbref_passing_stats(season="2023-2024"):
+    return fetch_fbref_table("passing", season)
 
 def flatten_multiindex_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Aplati les colonnes si elles sont en MultiIndex."""
@@ -99,3 +367,49 @@ def load_and_flatten_csv(path):
     ]
     
     return df
+
+def benchmark_table_parsing(paths, repeat=3):
+    """Compare extract_table à BeautifulSoup + read_html sur des pages FBref sauvegardées."""
+    results = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        table_id = next((table_id for _, table_id in STAT_TABLES.values() if f'id="{table_id}"' in html), None)
+        if table_id is None:
+            print(f"✗ {path} - aucun tableau FBref connu")
+            continue
+
+        timings, frames = {}, {}
+        for name, parse in (("extract_table", extract_table), ("bs4+read_html", parse_stats_table_bs4)):
+            try:
+                frames[name] = parse(html, table_id)
+                timings[name] = min(timeit.repeat(lambda: parse(html, table_id), number=1, repeat=repeat))
+            except Exception as e:
+                print(f"✗ {path} - {name} : {e}")
+                timings[name] = float("nan")
+
+        same = None
+        if len(frames) == 2:
+            try:
+                pd.testing.assert_frame_equal(frames["extract_table"], frames["bs4+read_html"])
+                same = True
+            except AssertionError:
+                same = False
+        results.append({"page": path, "table": table_id, "size_kb": len(html) // 1024,
+                        "rows": len(frames.get("extract_table", ())), **timings, "same": same})
+
+    report = pd.DataFrame(results)
+    if not report.empty:
+        print(report.to_string(index=False))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lecture des tableaux FBref")
+    parser.add_argument("--benchmark", nargs="+", metavar="PAGE",
+                        help="pages HTML sauvegardées : compare extract_table à BeautifulSoup + read_html")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark_table_parsing(args.benchmark, args.repeat)
+    else:
+        parser.print_help()
@@ -1,284 +1,180 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import unicodedata
-import re
-import difflib
 
-# 1. Charger les deux fichiers CSV
-liga_df = pd.read_csv("./datas/liga_players_positions.csv")
-serie_a_df = pd.read_csv("./datas/serie_a_players_positions.csv")
-ligue_1_df = pd.read_csv("./datas/ligue_1_players_positions.csv")
-bundesliga_df = pd.read_csv("./datas/bundesliga_players_positions.csv")
-premier_league_df = pd.read_csv("./datas/premier_league_players_positions.csv")
-
-# 2. Fusionner les deux DataFrames
-merged_df = pd.concat([liga_df, serie_a_df, ligue_1_df, bundesliga_df, premier_league_df], ignore_index=True)
-
-# 3. Sauvegarder le résultat dans un nouveau fichier CSV
-merged_df.to_csv("./datas/players_positions.csv", index=False)
-
-print("✅ Fusion terminée ! Le fichier 'players_positions_merged.csv' a été créé.")
-
-def normalize_name(name):
-    """Normalise un nom :
-       - NFKD pour séparer accents,
-       - suppression des caractères combinants,
-       - casefold() (meilleur que lower pour Unicode),
-       - suppression de la ponctuation, normalisation des espaces."""
-    if pd.isna(name):
-        return ""
-    s = str(name).strip()
-    s = unicodedata.normalize('NFKD', s)
-    s = ''.join(ch for ch in s if not unicodedata.combining(ch))
-    s = s.casefold()
-    s = re.sub(r"[^\w\s-]", "", s)       # garde lettres, chiffres, underscore, espaces et tiret
-    s = re.sub(r"\s+", " ", s)          # collapse espaces multiples
-    return s
-
-# ---------- Chargement ----------
-top5_df = pd.read_csv("./datas/top5-players.csv")
-positions_df = pd.read_csv("./datas/players_positions.csv")  # colonnes attendues : Name,Position
-
-# On travaille sur une copie (le fichier original reste intact)
-top5_copy = top5_df.copy()
-
-# ---------- Normalisation ----------
-positions_df['name_norm'] = positions_df['Name'].apply(normalize_name)
-top5_copy['name_norm'] = top5_copy['Player'].apply(normalize_name)
-
-# Vérifier doublons potentiels dans players_positions
-dups = positions_df[positions_df['name_norm'].duplicated(keep=False)]
-if not dups.empty:
-    print("ATTENTION: doublons détectés dans players_positions.csv (noms normalisés) :")
-    print(dups[['Name', 'name_norm']].to_string(index=False))
-    # On continue quand même (la dernière occurrence prendra le dessus si dict)
-
-# Création du mapping normalisé -> Position
-pos_map = dict(zip(positions_df['name_norm'], positions_df['Position']))
-pos_keys = list(pos_map.keys())
-
-# ---------- Fonction de recherche avec fallback ----------
-def find_position_for(norm_name, fuzzy_cutoff=0.85):
-    """Retourne (position, match_type) ou (None, None)."""
-    if not norm_name:
-        return None, None
-    # 1) match exact
-    if norm_name in pos_map:
-        return pos_map[norm_name], 'exact'
-    # 2) fuzzy (difflib)
-    match = difflib.get_close_matches(norm_name, pos_keys, n=1, cutoff=fuzzy_cutoff)
-    if match:
-        return pos_map[match[0]], f'fuzzy:{match[0]}'
-    # 3) fallback par nom de famille (dernier token) si unique dans la base
-    last = norm_name.split()[-1]
-    candidates = [k for k in pos_keys if k.split()[-1] == last]
-    if len(candidates) == 1:
-        return pos_map[candidates[0]], f'lastname:{candidates[0]}'
-    return None, None
-
-# ---------- Application du mapping ----------
-new_positions = []
-match_types = []
-for _, row in top5_copy.iterrows():
-    norm = row['name_norm']
-    pos, mtype = find_position_for(norm, fuzzy_cutoff=0.85)  # ajuste cutoff si besoin
-    if pos:
-        new_positions.append(pos)
-        match_types.append(mtype)
-    else:
-        # conserver l'ancien poste si pas de correspondance
-        new_positions.append(row['Pos'])
-        match_types.append('original')
-
-top5_copy['Pos'] = new_positions
-top5_copy['match_type'] = match_types
-
-# ---------- Rapport ----------
-# comparer avec l'original pour connaître ce qui a changé
-changed_idx = top5_copy.index[top5_copy['Pos'] != top5_df['Pos']].tolist()
-print(f"\n✅ {len(changed_idx)} postes remplacés sur {len(top5_copy)} joueurs.\n")
-if changed_idx:
-    changed = top5_copy.loc[changed_idx].copy()
-    changed['old_Pos'] = top5_df.loc[changed_idx, 'Pos'].values
-    print("Remplacements (Player | ancien -> nouveau | méthode) :")
-    for _, r in changed.iterrows():
-        print(f"- {r['Player']} | {r['old_Pos']} -> {r['Pos']} | {r['match_type']}")
-
-unmatched = top5_copy[top5_copy['match_type'] == 'original']
-print(f"\nℹ️ {len(unmatched)} joueurs non appariés (poste d'origine conservé).")
-if len(unmatched) > 0:
-    print("Liste des non-appariés (extrait) :")
-    print(unmatched['Player'].tolist()[:20])  # montre jusqu'à 20
-
-# ---------- Sauvegarde ----------
-out_path = "./datas_cleaned/top5_players_with_positions.csv"
-top5_copy.to_csv(out_path, index=False)
-print(f"\nFichier sauvegardé : {out_path}")
-print("📄 Nouveau fichier créé : top5_players_with_positions.csv")
-
-def normalize_name(name):
-    """Nettoie et normalise un nom pour de meilleurs appariements."""
-    if pd.isna(name):
-        return ""
-    s = str(name).strip()
-    s = unicodedata.normalize('NFKD', s)
-    s = ''.join(ch for ch in s if not unicodedata.combining(ch))
-    s = s.casefold()
-    s = re.sub(r"[^\w\s-]", "", s)
-    s = re.sub(r"\s+", " ", s)
-    return s
-
-# 1. Charger les fichiers
-defensive_df = pd.read_csv("./datas/Defensive.csv", skiprows=1)
-positions_df = pd.read_csv("./datas/players_positions.csv")
-
-# 2. Travailler sur une copie
-defensive_copy = defensive_df.copy()
-
-# 3. Normaliser les noms
-defensive_copy['name_norm'] = defensive_copy['Player'].apply(normalize_name)
-positions_df['name_norm'] = positions_df['Name'].apply(normalize_name)
-
-# 4. Créer un mapping nom_normalisé -> position
-pos_map = dict(zip(positions_df['name_norm'], positions_df['Position']))
-pos_keys = list(pos_map.keys())
-
-# 5. Fonction de recherche avec fallback
-def find_position_for(norm_name, fuzzy_cutoff=0.85):
-    if not norm_name:
-        return None, None
-    # exact match
-    if norm_name in pos_map:
-        return pos_map[norm_name], 'exact'
-    # fuzzy match
-    match = difflib.get_close_matches(norm_name, pos_keys, n=1, cutoff=fuzzy_cutoff)
-    if match:
-        return pos_map[match[0]], f'fuzzy:{match[0]}'
-    # fallback par nom de famille
-    last = norm_name.split()[-1]
-    candidates = [k for k in pos_keys if k.split()[-1] == last]
-    if len(candidates) == 1:
-        return pos_map[candidates[0]], f'lastname:{candidates[0]}'
-    return None, None
-
-# 6. Remplacement des postes
-new_positions = []
-match_types = []
-
-for _, row in defensive_copy.iterrows():
-    norm = row['name_norm']
-    pos, mtype = find_position_for(norm)
-    if pos:
-        new_positions.append(pos)
-        match_types.append(mtype)
-    else:
-        new_positions.append(row['Pos'])
-        match_types.append('original')
-
-defensive_copy['Pos'] = new_positions
-defensive_copy['match_type'] = match_types
-
-# 7. Rapport des changements
-changed_idx = defensive_copy.index[defensive_copy['Pos'] != defensive_df['Pos']].tolist()
-print(f"\n✅ {len(changed_idx)} postes remplacés sur {len(defensive_copy)} joueurs.\n")
-
-if changed_idx:
-    changed = defensive_copy.loc[changed_idx].copy()
-    changed['old_Pos'] = defensive_df.loc[changed_idx, 'Pos'].values
-    print("Remplacements (Player | ancien -> nouveau | méthode) :")
-    for _, r in changed.iterrows():
-        print(f"- {r['Player']} | {r['old_Pos']} -> {r['Pos']} | {r['match_type']}")
-
-unmatched = defensive_copy[defensive_copy['match_type'] == 'original']
-print(f"\nℹ️ {len(unmatched)} joueurs non appariés (poste d'origine conservé).")
-if len(unmatched) > 0:
-    print("Liste des non-appariés (extrait) :")
-    print(unmatched['Player'].tolist()[:20])
-
-# 8. Sauvegarde
-output_file = "./datas_cleaned/Defensive_with_positions.csv"
-defensive_copy.to_csv(output_file, index=False)
-print(f"\n📄 Nouveau fichier créé : {output_file}")
-
-
-
-
-import unicodedata
-import re
-import difflib
-
-def normalize_name(name):
-    if pd.isna(name):
-        return ""
-    s = str(name).strip()
-    s = unicodedata.normalize('NFKD', s)
-    s = ''.join(ch for ch in s if not unicodedata.combining(ch))
-    s = s.casefold()
-    s = re.sub(r"[^\w\s-]", "", s)
-    s = re.sub(r"\s+", " ", s)
-    return s
-
-# 1. Charger Defensive.csv correctement
-defensive_df = pd.read_csv("./datas/Passing.csv", skiprows=1)
-positions_df = pd.read_csv("./datas/players_positions.csv")
-
-# 2. Copier pour travailler sans toucher à l’original
-defensive_copy = defensive_df.copy()
-
-# 3. Normaliser les noms
-defensive_copy['name_norm'] = defensive_copy['Player'].apply(normalize_name)
-positions_df['name_norm'] = positions_df['Name'].apply(normalize_name)
-
-# 4. Créer mapping
-pos_map = dict(zip(positions_df['name_norm'], positions_df['Position']))
-pos_keys = list(pos_map.keys())
-
-def find_position_for(norm_name, fuzzy_cutoff=0.85):
-    if not norm_name:
-        return None, None
-    if norm_name in pos_map:
-        return pos_map[norm_name], 'exact'
-    match = difflib.get_close_matches(norm_name, pos_keys, n=1, cutoff=fuzzy_cutoff)
-    if match:
-        return pos_map[match[0]], f'fuzzy:{match[0]}'
-    last = norm_name.split()[-1]
-    candidates = [k for k in pos_keys if k.split()[-1] == last]
-    if len(candidates) == 1:
-        return pos_map[candidates[0]], f'lastname:{candidates[0]}'
-    return None, None
-
-# 5. Remplacement
-new_positions = []
-match_types = []
-
-for _, row in defensive_copy.iterrows():
-    norm = row['name_norm']
-    pos, mtype = find_position_for(norm)
-    if pos:
-        new_positions.append(pos)
-        match_types.append(mtype)
-    else:
-        new_positions.append(row['Pos'])
-        match_types.append('original')
-
-defensive_copy['Pos'] = new_positions
-defensive_copy['match_type'] = match_types
-
-# 6. Rapport
-changed_idx = defensive_copy.index[defensive_copy['Pos'] != defensive_df['Pos']].tolist()
-print(f"\n✅ {len(changed_idx)} postes remplacés sur {len(defensive_copy)} joueurs.\n")
-
-if changed_idx:
-    changed = defensive_copy.loc[changed_idx].copy()
-    changed['old_Pos'] = defensive_df.loc[changed_idx, 'Pos'].values
-    for _, r in changed.iterrows():
-        print(f"- {r['Player']} | {r['old_Pos']} -> {r['Pos']} | {r['match_type']}")
-
-unmatched = defensive_copy[defensive_copy['match_type'] == 'original']
-print(f"\nℹ️ {len(unmatched)} joueurs non appariés (poste d'origine conservé).")
-if len(unmatched) > 0:
-    print(unmatched['Player'].tolist()[:20])
-
-# 7. Sauvegarde
-output_file = "./datas_cleaned/Passing_with_positions.csv"
-defensive_copy.to_csv(output_file, index=False)
-print(f"\n📄 Nouveau fichier créé : {output_file}")
\ No newline at end of file
+dashboard_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dashboard')
+if dashboard_path not in sys.path:
+    sys.path.insert(0, dashboard_path)
+
+from name_matcher import NameMatcher, normalize_names, read_name_cache, write_name_cache
+
+LEAGUE_POSITIONS_FILES = [
+    "./datas/liga_players_positions.csv",
+    "./datas/serie_a_players_positions.csv",
+    "./datas/ligue_1_players_positions.csv",
+    "./datas/bundesliga_players_positions.csv",
+    "./datas/premier_league_players_positions.csv"
+]
+POSITIONS_FILE = "./datas/players_positions.csv"
+# noms déjà normalisés lors des passages précédents
+NAME_CACHE_FILE = "./datas/names_normalized.csv"
+OUTPUT_DIR = "./datas_cleaned"
+
+DEFAULT_INPUTS = [
+    "./datas/top5-players.csv",
+    "./datas/Defensive.csv",
+    "./datas/Passing.csv"
+]
+
+def merge_league_positions(league_files=LEAGUE_POSITIONS_FILES, out_path=POSITIONS_FILE):
+    """Fusionne les fichiers de postes par ligue dans players_positions.csv."""
+    merged_df = pd.concat([pd.read_csv(path) for path in league_files], ignore_index=True)
+    merged_df.to_csv(out_path, index=False)
+    print(f"✅ Fusion terminée ! Le fichier '{os.path.basename(out_path)}' a été créé.")
+    return merged_df
+
+def load_position_map(positions_path=POSITIONS_FILE, known_names=None):
+    """Mapping nom normalisé -> poste (la dernière occurrence l'emporte)."""
+    positions_df = pd.read_csv(positions_path)  # colonnes attendues : Name,Position
+    positions_df['name_norm'] = normalize_names(positions_df['Name'], known_names)
+
+    dups = positions_df[positions_df['name_norm'].duplicated(keep=False)]
+    if not dups.empty:
+        print(f"ATTENTION: doublons détectés dans {os.path.basename(positions_path)} (noms normalisés) :")
+        print(dups[['Name', 'name_norm']].to_string(index=False))
+
+    return dict(zip(positions_df['name_norm'], positions_df['Position']))
+
+def read_stats_file(path):
+    """Lit un export FBref (entête simple ou double)."""
+    df = pd.read_csv(path)
+    if 'Player' not in df.columns:
+        df = pd.read_csv(path, skiprows=1)
+    return df
+
+def output_path_for(path, out_dir=OUTPUT_DIR):
+    stem = os.path.splitext(os.path.basename(path))[0].replace('-', '_')
+    return os.path.join(out_dir, f"{stem}_with_positions.csv")
+
+# ---------- Appariement (un matcher par process) ----------
+_MATCHER = None
+
+def _init_matcher(pos_map):
+    global _MATCHER
+    _MATCHER = NameMatcher(pos_map)
+
+def _match_shard(args):
+    names, fuzzy_cutoff = args
+    return [_MATCHER.match(name, fuzzy_cutoff) for name in names]
+
+def match_names(names, pos_map, fuzzy_cutoff=0.85, workers=1):
+    """(position, match_type) de chaque nom normalisé, dans l'ordre de names.
+
+    Avec workers > 1 les noms sont répartis en paquets sur un pool de process ;
+    le résultat est identique à l'exécution séquentielle.
+    """
+    names = list(names)
+    if workers <= 1 or len(names) < 2:
+        _init_matcher(pos_map)
+        return _match_shard((names, fuzzy_cutoff))
+
+    shard_size = max(1, -(-len(names) // (workers * 4)))
+    shards = [(names[i:i + shard_size], fuzzy_cutoff) for i in range(0, len(names), shard_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_matcher, initargs=(pos_map,)) as pool:
+        results = []
+        for shard_result in pool.map(_match_shard, shards):
+            results.extend(shard_result)
+    return results
+
+def apply_positions(df, matches, known_names=None):
+    """Copie de df avec Pos remplacé par le poste trouvé (sinon conservé) et la colonne match_type.
+
+    matches : nom normalisé -> (position, match_type).
+    """
+    result = df.copy()
+    result['name_norm'] = normalize_names(result['Player'], known_names)
+
+    new_positions = []
+    match_types = []
+    for norm, old_pos in zip(result['name_norm'], result['Pos']):
+        pos, mtype = matches.get(norm, (None, None))
+        if pos:
+            new_positions.append(pos)
+            match_types.append(mtype)
+        else:
+            # conserver l'ancien poste si pas de correspondance
+            new_positions.append(old_pos)
+            match_types.append('original')
+
+    result['Pos'] = new_positions
+    result['match_type'] = match_types
+    return result
+
+def report(original_df, matched_df):
+    # comparer avec l'original pour connaître ce qui a changé
+    changed_idx = matched_df.index[matched_df['Pos'] != original_df['Pos']].tolist()
+    print(f"\n✅ {len(changed_idx)} postes remplacés sur {len(matched_df)} joueurs.\n")
+    if changed_idx:
+        changed = matched_df.loc[changed_idx].copy()
+        changed['old_Pos'] = original_df.loc[changed_idx, 'Pos'].values
+        print("Remplacements (Player | ancien -> nouveau | méthode) :")
+        for _, r in changed.iterrows():
+            print(f"- {r['Player']} | {r['old_Pos']} -> {r['Pos']} | {r['match_type']}")
+
+    unmatched = matched_df[matched_df['match_type'] == 'original']
+    print(f"\nℹ️ {len(unmatched)} joueurs non appariés (poste d'origine conservé).")
+    if len(unmatched) > 0:
+        print("Liste des non-appariés (extrait) :")
+        print(unmatched['Player'].tolist()[:20])  # montre jusqu'à 20
+
+def match_files(paths, pos_map, fuzzy_cutoff=0.85, workers=1, out_dir=OUTPUT_DIR, known_names=None):
+    """Apparie les postes de plusieurs fichiers de stats et écrit les *_with_positions.csv.
+
+    Les noms de tous les fichiers sont appariés une seule fois chacun, en parallèle.
+    """
+    if known_names is None:
+        known_names = {}
+    frames = {path: read_stats_file(path) for path in paths}
+
+    unique_names = list(dict.fromkeys(
+        norm for df in frames.values() for norm in normalize_names(df['Player'], known_names)
+    ))
+    matches = dict(zip(unique_names, match_names(unique_names, pos_map, fuzzy_cutoff, workers)))
+
+    outputs = {}
+    for path, df in frames.items():
+        matched_df = apply_positions(df, matches, known_names)
+        print(f"\n===== {os.path.basename(path)} =====")
+        report(df, matched_df)
+
+        out_path = output_path_for(path, out_dir)
+        matched_df.to_csv(out_path, index=False)
+        print(f"\n📄 Nouveau fichier créé : {out_path}")
+        outputs[path] = out_path
+    return outputs
+
+def main():
+    parser = argparse.ArgumentParser(description="Remplace les postes FBref par les postes détaillés (appariement par nom).")
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS, help="fichiers de stats FBref à apparier")
+    parser.add_argument("--positions", default=POSITIONS_FILE, help="fichier Name,Position de référence")
+    parser.add_argument("--workers", type=int, default=1, help="nombre de process pour l'appariement")
+    parser.add_argument("--cutoff", type=float, default=0.85, help="seuil du fuzzy matching")
+    parser.add_argument("--out-dir", default=OUTPUT_DIR)
+    parser.add_argument("--skip-merge", action="store_true",
+                        help="ne pas régénérer players_positions.csv à partir des fichiers par ligue")
+    args = parser.parse_args()
+
+    if not args.skip_merge:
+        merge_league_positions(out_path=args.positions)
+
+    known_names = read_name_cache(NAME_CACHE_FILE)
+    cached = len(known_names)
+    pos_map = load_position_map(args.positions, known_names)
+    match_files(args.inputs, pos_map, args.cutoff, args.workers, args.out_dir, known_names)
+    if len(known_names) != cached:
+        write_name_cache(NAME_CACHE_FILE, known_names)
+
+if __name__ == "__main__":
+    main()
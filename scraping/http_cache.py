@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Dossier du cache (relatif au dossier de lancement, comme logos/ et datas/)
+CACHE_DIR = os.environ.get("HTTP_CACHE_DIR", ".http_cache")
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+ENTRY_EXT = ".entry"
+
+# Entêtes de validation conservés d'une réponse 304 à l'autre
+VALIDATORS = ("ETag", "Last-Modified")
+
+class CacheMiss(Exception):
+    """URL absente du cache en mode rejeu (aucun accès réseau autorisé)."""
+
+def _response(url, meta, body):
+    # Réponse requests reconstruite depuis le disque : .text, .content, .headers, raise_for_status()
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.url = meta.get("final_url") or url
+    resp.headers = CaseInsensitiveDict(meta["headers"])
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp._content = body
+    resp._content_consumed = True
+    resp.from_cache = True
+    return resp
+
+class HttpCache:
+    """Cache disque des réponses HTTP 200, indexé par URL.
+
+    - une entrée de moins de ttl secondes est servie sans réseau ;
+    - au-delà, GET conditionnel (If-None-Match / If-Modified-Since) : un 304 resert l'entrée ;
+    - la taille totale reste sous max_bytes (les entrées les moins récemment utilisées partent d'abord) ;
+    - replay=True n'accède jamais au réseau : toute URL absente lève CacheMiss.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, replay=False):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.replay = replay
+        self.stats = {"hit": 0, "revalidated": 0, "miss": 0}
+        self._lock = threading.Lock()
+
+    def _path(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key + ENTRY_EXT)
+
+    def _read(self, url):
+        # une entrée = une ligne JSON (métadonnées) puis le corps brut
+        try:
+            with open(self._path(url), "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        if meta.get("url") != url:
+            return None, None
+        return meta, body
+
+    def _write(self, url, meta, body):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(url)
+        # écriture puis renommage : un lecteur concurrent voit l'ancienne entrée ou la nouvelle complète
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(meta).encode("utf-8") + b"\n")
+                f.write(body)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def _touch(self, url):
+        # la date de modification du fichier sert d'horodatage LRU
+        try:
+            os.utime(self._path(url))
+        except OSError:
+            pass
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(ENTRY_EXT):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+    def fresh(self, url):
+        """Réponse servie sans réseau (entrée récente, ou toute entrée en mode rejeu), sinon None."""
+        meta, body = self._read(url)
+        if meta is None:
+            if self.replay:
+                raise CacheMiss(url)
+            return None
+        if not self.replay and time.time() - meta["stored_at"] >= self.ttl:
+            return None
+        self._touch(url)
+        self.stats["hit"] += 1
+        return _response(url, meta, body)
+
+    def get(self, url, session=None, headers=None, **kwargs):
+        """GET via le cache ; session (requests.Session) sert pour les accès réseau."""
+        resp = self.fresh(url)
+        if resp is not None:
+            return resp
+
+        meta, body = self._read(url)
+        headers = dict(headers or {})
+        if meta is not None:
+            stored = CaseInsensitiveDict(meta["headers"])
+            if "ETag" in stored:
+                headers["If-None-Match"] = stored["ETag"]
+            if "Last-Modified" in stored:
+                headers["If-Modified-Since"] = stored["Last-Modified"]
+
+        resp = (session or requests).get(url, headers=headers, **kwargs)
+
+        if resp.status_code == 304 and meta is not None:
+            for name in VALIDATORS:
+                if name in resp.headers:
+                    meta["headers"][name] = resp.headers[name]
+            meta["stored_at"] = time.time()
+            self._write(url, meta, body)
+            self.stats["revalidated"] += 1
+            return _response(url, meta, body)
+
+        if resp.status_code == 200:
+            meta = {"url": url, "final_url": resp.url, "headers": dict(resp.headers), "stored_at": time.time()}
+            self._write(url, meta, resp.content)
+            self.stats["miss"] += 1
+        resp.from_cache = False
+        return resp
+
+_default_cache = None
+
+def default_cache():
+    """Cache partagé des scrapers (HTTP_CACHE_REPLAY=1 : rejeu seul, sans réseau)."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = HttpCache(replay=os.environ.get("HTTP_CACHE_REPLAY") == "1")
+    return _default_cache
+
+def get(url, **kwargs):
+    return default_cache().get(url, **kwargs)
@@ -0,0 +1,119 @@
+import numpy as np
+
+# Nombre de valeurs gardées par résumé de quantiles : exact en dessous
+DEFAULT_CAPACITY = 1 << 14
+
+def _finite(values):
+    values = np.asarray(values, dtype='float64')
+    return values[~np.isnan(values)]
+
+class QuantileSketch:
+    """Résumé de quantiles fusionnable (compactions successives, à la KLL).
+
+    Les valeurs sont gardées telles quelles tant qu'il y en a moins de capacity :
+    quantile() et median() donnent alors exactement les résultats de pandas.
+    Au-delà, chaque compaction trie un niveau et n'en garde qu'une valeur sur deux,
+    avec un poids double ; l'erreur de rang reste de l'ordre de log2(n / capacity) / capacity.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = max(int(capacity), 64)
+        self.levels = [np.empty(0)]  # niveau i : valeurs de poids 2 ** i
+        self.count = 0
+        self._offset = 0
+
+    @property
+    def exact(self):
+        return len(self.levels) == 1
+
+    def update(self, values):
+        values = _finite(values)
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.count += len(values)
+            self._compress()
+        return self
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def clipped(self, lower, upper):
+        """Résumé des mêmes valeurs écrêtées dans [lower, upper] (bornes NaN ignorées)."""
+        sketch = QuantileSketch(self.capacity)
+        sketch.levels = [np.fmin(np.fmax(items, lower), upper) for items in self.levels]
+        sketch.count = self.count
+        sketch._offset = self._offset
+        return sketch
+
+    def _compress(self):
+        level = 0
+        while sum(len(items) for items in self.levels) > self.capacity:
+            items = np.sort(self.levels[level])
+            if len(items) >= 2:
+                # nombre impair : la plus grande valeur reste à ce niveau
+                kept = items[len(items) - len(items) % 2:]
+                promoted = items[self._offset:len(items) - len(items) % 2:2]
+                self._offset ^= 1
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = kept
+            level = (level + 1) % len(self.levels)
+
+    def _weighted(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Quantile q (interpolation linéaire, comme pandas, tant que le résumé est exact)."""
+        if self.count == 0:
+            return np.nan
+        if self.exact:
+            return float(np.quantile(self.levels[0], q))
+        values, cumulative = self._weighted()
+        rank = q * (self.count - 1)
+        return float(values[min(np.searchsorted(cumulative, rank, side='right'), len(values) - 1)])
+
+    def median(self):
+        if self.exact and self.count:
+            return float(np.median(self.levels[0]))
+        return self.quantile(0.5)
+
+class Moments:
+    """Effectif, moyenne et variance fusionnables (formule de Chan)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = _finite(values)
+        if len(values):
+            mean = values.mean()
+            self._combine(len(values), mean, ((values - mean) ** 2).sum())
+        return self
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    def std(self):
+        """Écart-type corrigé (ddof=1, comme pandas)."""
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
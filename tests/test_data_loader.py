@@ -0,0 +1,50 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dashboard'))
+
+from data_loader import columnar_path, read_csv_typed, write_columnar
+
+def test_chunked_columnar_copy_matches_full_read(tmp_path):
+    # colonne entière avec un trou dans un seul bloc, texte vide dans un bloc entier
+    df = pd.DataFrame({
+        'Rk': np.arange(1, 11),
+        'Player': [f'P{i}' for i in range(10)],
+        'Nation': [None] * 4 + ['fr FRA'] * 6,
+        'Pos': ['DF'] * 10,
+        'Squad': ['A'] * 10,
+        'Comp': ['fr Ligue 1'] * 10,
+        'Starts': [1, 2, 3, 4, 5, 6, None, 8, 9, 10],
+        'Gls': range(10),
+        'xG': np.linspace(0, 1, 10),
+    })
+    df.to_csv(tmp_path / 'top5-players.csv', index=False)
+    path = columnar_path('top5-players.csv', str(tmp_path))
+
+    assert write_columnar('top5-players.csv', str(tmp_path))
+    full = pd.read_parquet(path)
+    assert write_columnar('top5-players.csv', str(tmp_path), chunksize=3)
+    chunked = pd.read_parquet(path)
+
+    pd.testing.assert_frame_equal(chunked, full)
+    assert full['Gls'].dtype == 'int64' and full['Starts'].dtype == 'float64'
+
+def test_text_columns_keep_missing_values(tmp_path):
+    # Comp entièrement vide et Squad lue comme nombres : pas de texte "nan"
+    df = pd.DataFrame({
+        'Player': ['A', 'B', 'C'],
+        'Squad': [1, None, 3],
+        'Comp': [None, None, None],
+        'Gls': [1, 2, 3],
+    })
+    df.to_csv(tmp_path / 'top5-players.csv', index=False)
+    raw = pd.read_csv(tmp_path / 'top5-players.csv')
+
+    assert write_columnar('top5-players.csv', str(tmp_path))
+    for typed in (read_csv_typed('top5-players.csv', str(tmp_path)),
+                  pd.read_parquet(columnar_path('top5-players.csv', str(tmp_path)))):
+        pd.testing.assert_frame_equal(typed.isna(), raw.isna())
+        assert typed['Squad'].dropna().tolist() == ['1.0', '3.0']
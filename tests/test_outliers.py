@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from outliers import SeenHashes, clip_outliers
+
+def iqr_bounds(values):
+    q1, q3 = values.quantile(0.25), values.quantile(0.75)
+    return q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+
+def test_grouped_report_with_all_nan_group_column():
+    # xG est entièrement vide pour les DF : la ligne du rapport doit rester (bornes NaN)
+    df = pd.DataFrame({
+        'Pos': ['DF', 'DF', 'MF', 'MF', 'MF', 'MF', 'MF', 'FW', None],
+        'Comp': ['a', 'b', 'a', 'a', 'a', 'a', 'a', 'b', 'a'],
+        'Gls': [1, 2, 3, 4, 5, 4, 40, 5, 6],
+        'xG': [np.nan, np.nan, 1.0, 2.0, 1.5, 1.0, 2.0, 3.0, 9.0],
+    })
+
+    for groups in (['Pos'], ['Pos', 'Comp']):
+        cleaned, report = clip_outliers(df, 'iqr', groups)
+        assert len(cleaned) == len(df)
+        assert report.index.names == groups + ['column']
+        assert len(report) == df.groupby(groups, dropna=False).ngroups * 2
+
+    cleaned, report = clip_outliers(df, 'iqr', ['Pos'])
+    assert report.loc[('DF', 'xG'), ['lower', 'upper']].isna().all()
+    assert report.loc[('MF', 'Gls'), 'outliers'] == 1
+    lower, upper = iqr_bounds(df.loc[df['Pos'] == 'MF', 'Gls'])
+    assert np.isclose(report.loc[('MF', 'Gls'), 'lower'], lower)
+    assert np.isclose(report.loc[('MF', 'Gls'), 'upper'], upper)
+    assert cleaned.loc[6, 'Gls'] == upper
+
+def test_seen_hashes_matches_a_set():
+    rng = np.random.default_rng(0)
+    seen, reference = SeenHashes(), set()
+    for _ in range(40):
+        hashes = rng.integers(0, 500, size=rng.integers(1, 60)).astype('uint64')
+        expected = np.array([h in reference for h in hashes])
+        assert (seen.contains(hashes) == expected).all()
+        seen.add(hashes)
+        reference.update(hashes.tolist())
+    assert len(seen) == len(reference)
+    assert len(seen.runs) <= int(np.log2(len(reference))) + 1
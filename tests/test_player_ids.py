@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dashboard'))
+
+from player_ids import attach_player_ids, build_crosswalk
+
+def source_tables():
+    # même nom normalisé dans les deux fichiers : deux paires d'homonymes et un même joueur
+    top5 = pd.DataFrame({
+        'Player': ['Éderson', 'Fernando', 'Alisson'],
+        'Born': [1999, 1987, 1992],
+        'Pos': ['MF', 'MF', 'GK'],
+        'Squad': ['Atalanta', 'Sevilla', 'Liverpool'],
+        'Comp': ['it Serie A', 'es La Liga', 'eng Premier League'],
+    })
+    keepers = pd.DataFrame({
+        'Player': ['Ederson', 'Fernando', 'Alisson'],
+        'Born': [1993, 1990, 1993],
+        'Squad': ['Manchester City', 'Almería', 'Liverpool'],
+        'Comp': ['eng Premier League', 'es La Liga', 'eng Premier League'],
+    })
+    return {'top5-players.csv': top5, 'keepers.csv': keepers}
+
+def ids_by_name(crosswalk, source):
+    rows = crosswalk[crosswalk['source'] == source]
+    return dict(zip(rows['Player'], rows['player_id']))
+
+def test_homonyms_across_files_get_distinct_ids():
+    tables = source_tables()
+    crosswalk = build_crosswalk(tables)
+    top5 = ids_by_name(crosswalk, 'top5-players.csv')
+    keepers = ids_by_name(crosswalk, 'keepers.csv')
+
+    # naissances éloignées / gardien contre joueur de champ
+    assert top5['Éderson'] != keepers['Ederson']
+    assert top5['Fernando'] != keepers['Fernando']
+    # un an d'écart et même poste : même joueur
+    assert top5['Alisson'] == keepers['Alisson']
+
+    for source, df in tables.items():
+        attached = attach_player_ids(df, source, crosswalk)
+        assert attached['player_id'].tolist() == [ids_by_name(crosswalk, source)[name] for name in df['Player']]
+
+    # reconstruction : mêmes identifiants
+    rebuilt = build_crosswalk(tables, previous=crosswalk)
+    pd.testing.assert_frame_equal(rebuilt, crosswalk)
@@ -0,0 +1,159 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'scraping'))
+
+import http_cache
+from http_cache import CacheMiss, HttpCache
+from Scraping import STAT_TABLES, fbref_url, fetch_fbref_tables
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Segment d'URL FBref -> page sauvegardée
+PAGES = {
+    STAT_TABLES['keepers'][0]: 'fbref_keepers.html',
+    STAT_TABLES['defense'][0]: 'fbref_defense.html',
+}
+
+class FBrefStandIn(ThreadingHTTPServer):
+    """Faux FBref local : pages sauvegardées, réponses d'erreur scriptées par chemin, compteurs."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FBrefHandler)
+        self.lock = threading.Lock()
+        self.scripted = {}   # chemin -> statuts à renvoyer avant la page
+        self.hits = {}
+        self.active = 0
+        self.peak = 0
+        self.delay = 0.0
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_port}'
+
+    def path_of(self, stat_type, season):
+        return fbref_url(stat_type, season, '')
+
+class FBrefHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            scripted = server.scripted.get(self.path, [])
+            status = scripted.pop(0) if scripted else 200
+        try:
+            time.sleep(server.delay)
+            segment = self.path.split('/')[5]
+            if status == 200 and segment not in PAGES:
+                status = 404
+            body = b''
+            if status == 200:
+                with open(os.path.join(FIXTURES, PAGES[segment]), 'rb') as f:
+                    body = f.read()
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            if status == 429:
+                self.send_header('Retry-After', '0')
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+@pytest.fixture
+def fbref():
+    server = FBrefStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def fetch(server, tables, cache, **kwargs):
+    kwargs.setdefault('min_interval', 0)
+    kwargs.setdefault('backoff', 0)
+    return fetch_fbref_tables(tables, base_url=server.base_url, cache=cache, **kwargs)
+
+def test_parses_fixture_tables(fbref, tmp_path):
+    tables = fetch(fbref, [('keepers', '2023-2024'), ('defense', '2023-2024')], HttpCache(str(tmp_path)))
+
+    keepers = tables[('keepers', '2023-2024')]
+    assert keepers.columns[7] == ('Playing Time', 'Min')
+    assert keepers.columns[1][1] == 'Player'
+    assert keepers.iloc[:, 1].tolist() == ['Alisson', 'Yann Sommer', 'Gregor Kobel']
+    assert keepers.iloc[:, 2].tolist() == ['br BRA', 'ch SUI', 'ch SUI']
+    assert keepers[('Playing Time', 'Min')].tolist() == [2520, 3060, 2610]
+    assert keepers[('Performance', 'Save%')].isna().tolist() == [False, True, False]
+
+    # tableau caché dans un commentaire HTML
+    defense = tables[('defense', '2023-2024')]
+    assert list(defense.columns.get_level_values(1)) == ['Rk', 'Player', 'Pos', 'Tkl', 'TklW', 'Tkl', 'Att']
+    assert defense[('Challenges', 'Att')].tolist() == [34, 27]
+
+def test_retries_scripted_errors(fbref, tmp_path):
+    keepers = fbref.path_of('keepers', '2022-2023')
+    defense = fbref.path_of('defense', '2022-2023')
+    fbref.scripted[keepers] = [429, 503]
+    fbref.scripted[defense] = [500]
+
+    tables = fetch(fbref, [('keepers', '2022-2023'), ('defense', '2022-2023')], HttpCache(str(tmp_path)))
+
+    assert fbref.hits == {keepers: 3, defense: 2}
+    assert len(tables[('keepers', '2022-2023')]) == 3
+
+def test_gives_up_after_retries_and_on_client_errors(fbref, tmp_path):
+    path = fbref.path_of('keepers', '2021-2022')
+    fbref.scripted[path] = [503] * 10
+    with pytest.raises(Exception, match='503'):
+        fetch(fbref, [('keepers', '2021-2022')], HttpCache(str(tmp_path)), retries=2)
+    assert fbref.hits[path] == 3
+
+    # 404 : pas de nouvelle tentative
+    with pytest.raises(Exception, match='404'):
+        fetch(fbref, [('misc', '2021-2022')], HttpCache(str(tmp_path)))
+    assert fbref.hits[fbref.path_of('misc', '2021-2022')] == 1
+
+def test_caps_concurrent_requests_per_host(fbref, tmp_path):
+    fbref.delay = 0.2
+    seasons = [f'{year}-{year + 1}' for year in range(2017, 2023)]
+    tables = fetch(fbref, [('keepers', season) for season in seasons], HttpCache(str(tmp_path)), max_per_host=2)
+
+    assert len(tables) == len(seasons)
+    assert fbref.peak == 2
+    assert sum(fbref.hits.values()) == len(seasons)
+
+def test_replay_mode_never_touches_the_network(fbref, tmp_path, monkeypatch):
+    fetch(fbref, [('keepers', '2023-2024')], HttpCache(str(tmp_path)))
+    assert sum(fbref.hits.values()) == 1
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('HTTP_CACHE_REPLAY', '1')
+    monkeypatch.setattr(http_cache, '_default_cache', None)
+    cache = HttpCache(str(tmp_path), replay=True)
+    replayed = fetch(fbref, [('keepers', '2023-2024')], cache)
+    assert sum(fbref.hits.values()) == 1
+    assert cache.stats['hit'] == 1
+    assert isinstance(replayed[('keepers', '2023-2024')], pd.DataFrame)
+
+    # cache par défaut (variable d'environnement) : une page absente n'est pas téléchargée
+    with pytest.raises(CacheMiss):
+        fetch_fbref_tables([('defense', '2023-2024')], base_url=fbref.base_url, min_interval=0, backoff=0)
+    assert http_cache.default_cache().replay
+    assert sum(fbref.hits.values()) == 1